@@ -0,0 +1,135 @@
+# staroids_bench.py -- headless frame-rate benchmark of staroids_code.py
+# Runs the real game loop on the stand-in CircuitPython modules in host/stubs,
+# once per board profile, with a fixed RNG seed and scripted input.
+#   python host/staroids_bench.py                  # all boards
+#   python host/staroids_bench.py -b pybadge -n 3000 --script spin
+#   python host/staroids_bench.py --json > bench.json
+#   python host/staroids_bench.py --max-p95 5      # non-zero exit if slower, for CI
+#   python host/staroids_bench.py --set fixed_point=True
+#   python host/staroids_bench.py --parity         # fixed-point physics flies like the float one?
+#   python host/staroids_bench.py --slowdown 400   # exercise the quality governor
+#   python host/staroids_bench.py --profile        # plus the game's per-phase timings
+#   python host/staroids_bench.py --sound          # plus the sound mixer's numbers
+#   python host/staroids_bench.py -b pybadge --record in.bin   # then --replay in.bin
+#   python host/staroids_bench.py --trace golden   # record, then check, game state & screen checksums
+#   python host/staroids_bench.py --soak -n 100000  # autopilot plays, fps drift & GC pauses
+import argparse, ast, json, sys
+import staroids_sim
+
+columns = ('board', 'frames', 'fps', 'boot_ms', 'boot_kb', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms',
+           'area', 'skipped', 'quality', 'lat_ms', 'lat_max', 'shot_hw', 'exp_hw', 'roids_hw',
+           'leds_shown', 'gc_runs', 'blocks')
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument('-b', '--board', action='append', choices=sorted(staroids_sim.boards),
+                   help='board profile to run (default: all)')
+    p.add_argument('-n', '--frames', type=int, default=900)
+    p.add_argument('-s', '--seed', type=int, default=1)
+    p.add_argument('--script', default='random', choices=sorted(staroids_sim.scripts))
+    p.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                   help='override a game setting, like a staroids_settings.py would')
+    p.add_argument('--slowdown', type=float, default=0,
+                   help='emulate a device this many times slower than this computer')
+    p.add_argument('--boot-mem', action='store_true',
+                   help='measure peak memory used during boot (makes boot_ms slower)')
+    p.add_argument('--profile', action='store_true',
+                   help="turn on the game's profiler and print its summary")
+    p.add_argument('--record', metavar='FILE', help="record the game's input events to FILE")
+    p.add_argument('--replay', metavar='FILE', help='play back input events from FILE, not the script')
+    p.add_argument('--trace', metavar='FILE',
+                   help='run in lockstep and record checksums of the game state and screen to '
+                        'FILE.<board>.state/.fb, or compare with them if they are there')
+    p.add_argument('--trace-every', type=int, default=30, metavar='N',
+                   help='checksum every N ticks/frames (default 30)')
+    p.add_argument('--autopilot', type=float, metavar='AGGRESSION',
+                   help='the computer player flies the ship, 0 (calm) to 1 (aggressive)')
+    p.add_argument('--soak', action='store_true',
+                   help='print fps over the run and GC pause stats (autopilot 0.5 unless given)')
+    p.add_argument('--sound', action='store_true',
+                   help="turn on sound effects and print the mixer's report")
+    p.add_argument('--parity', action='store_true',
+                   help='only check fixed-point physics against the float physics, '
+                        'fail if a ship or shot ends up more than 2 pixels off')
+    p.add_argument('--json', action='store_true', help='print results as JSON')
+    p.add_argument('--max-p95', type=float, help='fail if any board p95 frame time (ms) is above this')
+    args = p.parse_args(argv)
+
+    if args.parity:
+        apart = staroids_sim.fixed_parity()
+        print('fixed-point vs float: %.2f pixels apart at worst' % apart)
+        return 1 if apart > 2 else 0
+
+    settings = {}
+    for s in args.set:
+        name, _, value = s.partition('=')
+        settings[name] = ast.literal_eval(value)
+
+    if args.profile:
+        settings['profiling'] = True
+    if args.sound:
+        settings['enable_sound'] = True
+    if args.record:
+        settings['input_record'] = args.record
+    if args.replay:
+        settings['input_replay'] = args.replay
+
+    if args.soak and args.autopilot is None:
+        args.autopilot = 0.5
+    if args.autopilot is not None:
+        settings['autopilot'] = args.autopilot
+    if args.trace:
+        settings.update(lockstep=True, random_seed=args.seed, checksum_every=args.trace_every)
+
+    results, differ = [], []
+    for board in args.board or staroids_sim.boards:
+        fb_trace = None
+        if args.trace:
+            settings['golden_trace'] = '%s.%s.state' % (args.trace, board)
+            if 'snapshot_load' not in settings:  # screen checksums go by frame, from the start
+                fb_trace = '%s.%s.fb' % (args.trace, board)
+        results.append(staroids_sim.run(board, args.frames, args.seed, args.script,
+                                        settings=settings, slowdown=args.slowdown,
+                                        trace_boot=args.boot_mem, fb_trace=fb_trace,
+                                        fb_every=args.trace_every))
+        if args.trace:
+            for what, trace in (('state', staroids_sim.state.game['trace']),
+                                ('screen', staroids_sim.state.fb_trace)):
+                if not trace:
+                    continue
+                print(board, what + ':', trace.report(), file=sys.stderr)
+                if trace.differ:
+                    differ.append(board)
+        if args.profile:
+            print(board, staroids_sim.state.game['prof'].summary(), file=sys.stderr)
+        if args.soak:
+            r = results[-1]
+            print(board, 'soak: fps by tenths', ' '.join('%.0f' % f for f in r['fps_windows']),
+                  'drift %+.1f%%,' % r['fps_drift'],
+                  'gc %d pauses %.2f ms total, p95 %.3f ms, max %.3f ms,' % (
+                      r['gc_runs'], r['gc_ms'], r['gc_p95_ms'], r['gc_max_ms']),
+                  'blocks %+d,' % r['blocks'], staroids_sim.state.game['pilot'].report(),
+                  file=sys.stderr)
+        if args.sound and staroids_sim.state.game.get('sounds'):
+            print(board, 'sound:', staroids_sim.state.game['sounds'].report(),
+                  '(%d cut off)' % staroids_sim.state.sound_cut, file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=1))
+    else:
+        print(' '.join('%9s' % c for c in columns))
+        for r in results:
+            print(' '.join(('%9.2f' if isinstance(r[c], float) else '%9s') % r[c] for c in columns))
+
+    if differ:
+        print('traces differ:', ', '.join(sorted(set(differ))), file=sys.stderr)
+        return 1
+    if args.max_p95 is not None:
+        slow = [r['board'] for r in results if r['p95_ms'] > args.max_p95]
+        if slow:
+            print('p95 frame time over %.2f ms:' % args.max_p95, ', '.join(slow), file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,383 @@
+# staroids_sim.py -- run staroids_code.py headless on a desktop computer
+# The stand-in CircuitPython modules in host/stubs/ all talk to this module
+# for the current board profile, scripted input and the fake clock.
+import os, sys, time, random, gc, runpy, collections, array, types, tracemalloc, builtins, platform
+import zlib
+
+host_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(host_dir)   # acts as the CIRCUITPY drive
+stubs_dir = os.path.join(host_dir, 'stubs')
+game_fname = os.path.join(root_dir, 'staroids_code.py')
+
+host_open = builtins.open
+
+class SimDone(Exception):
+    """Raised by the stand-in display.refresh() when the run is over"""
+
+# --- board profiles ---------------------------------------------------
+# one per board profile in staroids/boards.py. 'machine' is what os.uname()
+# reports on the real board (desktop is this computer) and 'mem' is roughly
+# what gc.mem_free() says on that board before the game loads. Where the
+# buttons are comes from the game's own profile, see input_map().
+
+Board = collections.namedtuple('Board', 'machine width height mem')
+Profile = collections.namedtuple('Profile', 'machine width height mem keys pins touch analog seesaw')
+Analog = collections.namedtuple('Analog', 'left right low mid high')
+
+boards = {
+    'macropad': Board('Adafruit Macropad RP2040 with rp2040', 128, 64, 160_000),
+    'funhouse': Board('Adafruit FunHouse with ESP32S2', 240, 240, 1_900_000),
+    'pybadge':  Board('Adafruit Pybadge with samd51j19', 160, 128, 100_000),
+    'pygamer':  Board('Adafruit PyGamer with samd51j19', 160, 128, 100_000),
+    'clue':     Board('Adafruit CLUE nRF52840 Express with nRF52840', 240, 240, 150_000),
+    'pyportal': Board('Adafruit PyPortal with samd51j20', 320, 240, 150_000),
+    'desktop':  Board(platform.machine(), 320, 240, 2_000_000),
+}
+
+def input_map(board):
+    """keys, pins, touch, analog & seesaw of 'board': which of the script's
+    controls each of its input sources in staroids/boards.py reads"""
+    from staroids import boards as game_boards  # needs the stubs, so only once running
+    from staroids.controls import LEFT, RIGHT, THRUST, FIRE, SELECT
+    bit_names = ((LEFT, 'left'), (RIGHT, 'right'), (THRUST, 'thrust'), (FIRE, 'fire'),
+                 (SELECT, 'select'))
+    def names(bits):  # control bits -> the script's names for them
+        return tuple(name for bit, name in bit_names if bits & bit)
+    sources = dict(game_boards.profiles)[board]['input']
+    m = {'keys': {}, 'pins': {}, 'touch': {}, 'analog': {}, 'seesaw': {}}
+    for kind, *args in sources:
+        if kind in ('keys', 'shift_keys'):
+            m['keys'].update((k, names(bits)) for k, bits in args[-1].items())
+        elif kind == 'buttons':
+            m['pins'].update((pin, names(bits)) for pin, bits in args[0].items())
+        elif kind == 'touch':
+            m['touch'][args[0]] = names(args[1])
+        elif kind == 'joystick':  # 16-bit AnalogIn
+            pin, low, high = args
+            m['analog'][pin] = Analog(('left',), ('right',), 0, (low + high) // 2, 65535)
+        elif kind == 'seesaw':    # 10-bit seesaw ADC
+            buttons, channel, low, high = args
+            m['seesaw'].update((b, names(bits)) for b, bits in buttons.items())
+            m['analog'][channel] = Analog(('left',), ('right',), 0, (low + high) // 2, 1023)
+    return m
+
+# --- scripted input ---------------------------------------------------
+# a script is a function of frame number that returns the set of held controls,
+# or a list of them for controls that change more than once during a frame
+
+def script_idle(seed):
+    return lambda frame: frozenset()
+
+def script_spin(seed):
+    # turn left forever, tapping thrust/fire every half second
+    def held(frame):
+        return frozenset(('left', 'thrust', 'fire') if frame % 15 < 5 else ('left',))
+    return held
+
+def script_random(seed):
+    # seeded "player": picks a new control combo every 10-30 frames
+    rng = random.Random(seed)
+    combos = ((), ('left',), ('right',), ('thrust', 'fire'), ('left', 'thrust', 'fire'),
+              ('right', 'thrust', 'fire'), ('fire',), ('select', 'thrust', 'fire'))
+    seg = [0, frozenset()]  # end frame, controls held until then
+    def held(frame):
+        while seg[0] <= frame:
+            seg[:] = seg[0] + rng.randint(10, 30), frozenset(rng.choice(combos))
+        return seg[1]
+    return held
+
+def script_taps(seed):
+    # random play, plus quick fire/turn taps that start and end between two frames
+    rand = script_random(seed)
+    rng = random.Random(seed + 1)
+    def held(frame):
+        now = rand(frame)
+        if rng.random() < 0.2:
+            tap = now | {rng.choice(('fire', 'thrust', 'left', 'right'))}
+            return [tap, now] if tap != now else now
+        return now
+    return held
+
+scripts = {'idle': script_idle, 'spin': script_spin, 'random': script_random, 'taps': script_taps}
+
+# --- sim state, read by the stubs -------------------------------------
+
+class State:
+    def __init__(self, profile, frames, script, fps, slowdown=0):
+        self.profile = profile
+        self.frames = frames      # stop after this many display refreshes
+        self.script = script
+        self.fps = fps            # sim clock advances 1/fps per refresh
+        self.slowdown = slowdown  # if set, frames take this many times host time
+        self.game = {}            # the game's globals, grabbed at the end
+        self.frame = 0
+        self.clock_ns = 0
+        self.held = frozenset()
+        self.key_queues = []      # keypad EventQueues wanting events
+        self.frame_ns = array.array('q', bytes(8 * frames))  # wall time of each frame
+        self.area = array.array('q', bytes(8 * frames))      # pixels redrawn each frame
+        self.skipped = 0          # frames that slept instead of refreshing
+        self.last_ns = None
+        self.boot_ns = 0
+        self.boot_peak = 0        # most memory used before the first frame, if traced
+        self.start_ns = 0
+        self.gc_start = 0
+        self.blocks_start = 0
+        self.leds_shown = 0       # times an LED strip was pushed out
+        self.sound_plays = 0      # sounds started on a mixer voice
+        self.sound_cut = 0        # of those, how many cut off one still playing
+        self.fb_trace = None      # Trace of framebuffer checksums, if checking them
+        self.fb_every = 0         # every this many frames
+        self.gc_pauses = []       # how long each garbage collection took after boot, ns
+        self.gc_t0 = 0
+
+    def set_input(self):
+        steps = self.script(self.frame)
+        for held in (steps if isinstance(steps, list) else (steps,)):
+            for q in self.key_queues:
+                q.sim_update(self.held, held, self.clock_ns)
+            self.held = held
+
+    def is_held(self, controls, held=None):
+        """True if any of 'controls' (names) are held, now or in 'held'"""
+        held = self.held if held is None else held
+        for c in controls:
+            if c in held:
+                return True
+        return False
+
+state = None
+
+def monotonic():
+    return state.clock_ns / 1e9
+
+def monotonic_ns():
+    return state.clock_ns
+
+def on_refresh(target_fps=None, area=0, now=None):
+    """called by the stand-in display at the end of every frame. 'now' is
+    when the game called refresh(), time after that is the sim's own"""
+    end_frame(now or time.perf_counter_ns(), 1_000_000_000 // (target_fps or state.fps), area)
+
+def check_framebuffer(display):
+    """called by the stand-in display before each refresh: checksum what's on
+    screen every fb_every frames, into (or against) the framebuffer trace"""
+    if state.fb_trace and state.frame % state.fb_every == 0:
+        state.fb_trace.check(state.frame, zlib.crc32(display.framebuffer()))
+
+def idle(ns):
+    """asyncio waiting for its next task: time passes, the frame goes on"""
+    state.clock_ns += ns
+
+def sleep(secs):
+    """time.sleep() for the game: ends a frame without a display refresh"""
+    state.skipped += 1
+    end_frame(time.perf_counter_ns(), int(secs * 1e9), 0)
+
+def end_frame(now, advance_ns, area):
+    if state.last_ns is None:
+        state.boot_ns = now - state.start_ns
+        if tracemalloc.is_tracing():
+            state.boot_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        state.gc_start = gc_collections()
+        state.blocks_start = sys.getallocatedblocks()
+        state.skipped = 0
+    else:
+        state.frame_ns[state.frame - 1] = now - state.last_ns
+        state.area[state.frame - 1] = area
+        if state.slowdown:  # pretend to be a slower device
+            advance_ns = max(advance_ns, int((now - state.last_ns) * state.slowdown))
+    state.frame += 1
+    state.clock_ns += advance_ns
+    if state.frame > state.frames:
+        state.game = sys.modules['__main__'].__dict__.copy()
+        raise SimDone()
+    state.set_input()
+    state.last_ns = time.perf_counter_ns()
+
+def open_file(fname, mode='r', *args, **kwargs):
+    """open() for the game and its modules: '/imgs/foo.bmp' lives in the repo root"""
+    if isinstance(fname, str) and fname.startswith('/') and \
+       os.path.isdir(os.path.join(root_dir, fname[1:].split('/')[0])):
+        fname = path(fname)
+    return host_open(fname, mode, *args, **kwargs)
+
+def path(fname):
+    return os.path.join(root_dir, fname.lstrip('/'))
+
+def gc_callback(phase, info):
+    # times Python's garbage collections once the game is running
+    if phase == 'start':
+        state.gc_t0 = time.perf_counter_ns()
+    elif state.last_ns is not None:
+        state.gc_pauses.append(time.perf_counter_ns() - state.gc_t0)
+
+def gc_collections():
+    return sum(s['collections'] for s in gc.get_stats())
+
+# --- running ----------------------------------------------------------
+
+stub_names = None
+
+def _reset_stubs():
+    global stub_names
+    if stub_names is None:
+        stub_names = set()
+        for f in os.listdir(stubs_dir):
+            stub_names.add(f[:-3] if f.endswith('.py') else f)
+    for name in list(sys.modules):
+        # the game's own package too, it holds on to the stubs it imported
+        if name.split('.')[0] in stub_names or name.split('.')[0] == 'staroids':
+            del sys.modules[name]
+
+Uname = collections.namedtuple('Uname', 'sysname nodename release version machine')
+
+def run(board, frames=600, seed=1, script='random', fps=30, quiet=True, settings=None,
+        slowdown=0, trace_boot=False, fb_trace=None, fb_every=30):
+    """run the game on one board profile for 'frames' frames, return stats dict
+    'settings' overrides the game's settings, as a staroids_settings.py would.
+    'slowdown' makes the sim clock run that many times slower than the host
+    (so the game sees realistic frame times), but runs are then not repeatable.
+    'trace_boot' measures peak memory up to the first frame, slowing boot down.
+    'fb_trace' is a file to record checksums of the screen to every 'fb_every'
+    frames, or to compare them with if it's there (see staroids/snapshot.py)"""
+    global state
+    profile = Profile(*boards[board], {}, {}, {}, {}, {})  # input filled in below
+    state = State(profile, frames, scripts[script](seed), fps, slowdown)
+    if stubs_dir not in sys.path:
+        sys.path.insert(0, stubs_dir)
+    if root_dir not in sys.path:
+        sys.path.insert(1, root_dir)
+    _reset_stubs()
+    profile = state.profile = profile._replace(**input_map(board))
+    if fb_trace:
+        from staroids.snapshot import Trace
+        state.fb_trace, state.fb_every = Trace(fb_trace), fb_every
+    sys.modules.pop('staroids_settings', None)
+    if settings:
+        mod = types.ModuleType('staroids_settings')
+        mod.__dict__.update(settings)
+        sys.modules['staroids_settings'] = mod
+    saved = time.monotonic, time.monotonic_ns, time.sleep, os.uname, sys.stdout
+    time.monotonic, time.monotonic_ns, time.sleep = monotonic, monotonic_ns, sleep
+    os.uname = lambda: Uname('sim', 'sim', '7.0.0', '', profile.machine)
+    builtins.open = open_file
+    gc.mem_free = lambda: profile.mem  # CPython has no mem_free(), so say what the board would
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    random.seed(seed)
+    gc.collect()
+    state.set_input()
+    if trace_boot:
+        tracemalloc.start()
+    state.start_ns = time.perf_counter_ns()
+    gc.callbacks.append(gc_callback)
+    try:
+        runpy.run_path(game_fname, run_name='__main__')
+    except SimDone:
+        pass
+    finally:
+        if quiet:
+            sys.stdout.close()
+        time.monotonic, time.monotonic_ns, time.sleep, os.uname, sys.stdout = saved
+        builtins.open = host_open
+        gc.callbacks.remove(gc_callback)
+        del gc.mem_free
+        sys.modules.pop('staroids_settings', None)
+        if 'controls' in state.game:
+            state.game['controls'].close()  # finish any recording
+        for trace in (state.game.get('trace'), state.fb_trace):
+            if trace:
+                trace.close()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return stats(board)
+
+class ParityTile:
+    # just enough TileGrid for ThingStore.update()
+    x = y = 0
+    hidden = False
+    def __getitem__(self, i): return 0
+    def __setitem__(self, i, v): pass
+
+def fixed_parity(ticks=300, num_tiles=36, width=160, height=128):
+    """fly a float & a fixed-point ship (staroids/things.py) through the same
+    turns & thrusts, and shots fired from them, returns how far apart they got
+    at worst, in pixels. fixed_point = True should play the same game"""
+    if root_dir not in sys.path:
+        sys.path.insert(1, root_dir)
+    from staroids.things import ThingStore, ThingStoreFixed
+    worst = 0
+    ships, shots = [], []
+    for Store in (ThingStore, ThingStoreFixed):
+        ship_store = Store(1, width, height, w=20, num_tiles=num_tiles, vmax=3)
+        shot_store = Store(1, width, height, vmax=3)
+        ships.append(ship_store.add(80, 64, vx=0.5, vy=0.2, angle=5.5, tilegrid=ParityTile()))
+        shots.append(shot_store.add(0, 0, tilegrid=ParityTile()))
+    def apart(a, b):
+        dx = (a.x - b.x + width / 2) % width - width / 2
+        dy = (a.y - b.y + height / 2) % height - height / 2
+        return (dx * dx + dy * dy) ** 0.5
+    for t in range(ticks):
+        phase = t // 50 % 4  # thrust, turn & thrust, coast, turn back
+        for ship, shot in zip(ships, shots):
+            if phase in (1, 3):
+                ship.turn(0.12 if phase == 1 else -0.12)
+            if phase < 2:
+                ship.thrust(0.06)
+            if t % 25 == 0:
+                shot.launch(ship, 3)
+            ship.update_pos(1 if phase < 2 else 0)
+            shot.update_pos()
+        worst = max(worst, apart(*ships), apart(*shots))
+    return worst
+
+def percentile(vals, p):
+    vals = sorted(vals)
+    if not vals:
+        return 0
+    return vals[min(len(vals) - 1, int(len(vals) * p / 100))]
+
+def window_fps(ft, n=10):
+    """frames per second in each of 'n' equal parts of the run"""
+    size = len(ft) // n
+    if not size:
+        return []
+    return [size * 1e9 / (sum(ft[k * size:(k + 1) * size]) or 1) for k in range(n)]
+
+def stats(board):
+    ft = state.frame_ns[:max(state.frame - 1, 0)]
+    controls = state.game.get('controls')
+    total = sum(ft) or 1
+    fps = window_fps(ft)
+    pauses = state.gc_pauses
+    return {
+        'board': board,
+        'frames': len(ft),
+        'fps': len(ft) * 1e9 / total,
+        'boot_ms': state.boot_ns / 1e6,
+        'boot_kb': state.boot_peak // 1024,
+        'p50_ms': percentile(ft, 50) / 1e6,
+        'p95_ms': percentile(ft, 95) / 1e6,
+        'p99_ms': percentile(ft, 99) / 1e6,
+        'max_ms': max(ft, default=0) / 1e6,
+        'area': sum(state.area[:len(ft)]) // max(len(ft), 1),  # avg pixels redrawn
+        'skipped': state.skipped,
+        'quality': state.game.get('quality', 0),  # governor level at the end
+        'lat_ms': controls.lat_sum / max(controls.lat_count, 1) if controls else 0,  # press -> shown
+        'lat_max': controls.lat_max if controls else 0,
+        'shot_hw': state.game['shot_pool'].high if 'shot_pool' in state.game else 0,  # pools' high-water marks
+        'exp_hw': state.game['exp_pool'].high if 'exp_pool' in state.game else 0,
+        'roids_hw': state.game.get('roids_high', 0),  # most asteroids in play at once
+        'leds_shown': state.leds_shown,  # LED strip show()s
+        'sound_plays': state.sound_plays,
+        'sound_cut': state.sound_cut,
+        'gc_runs': gc_collections() - state.gc_start,
+        'gc_ms': sum(pauses) / 1e6,  # time spent in those
+        'gc_p95_ms': percentile(pauses, 95) / 1e6,
+        'gc_max_ms': max(pauses, default=0) / 1e6,
+        'fps_windows': fps,
+        'fps_drift': (fps[-1] - fps[0]) * 100 / fps[0] if fps else 0,  # % from first tenth to last
+        'blocks': sys.getallocatedblocks() - state.blocks_start,  # growth since 1st frame
+    }
@@ -0,0 +1,28 @@
+# shared LED strip stand-in for neopixel & adafruit_dotstar
+import staroids_sim
+
+class Strip:
+    def __init__(self, n, brightness=1.0, auto_write=True):
+        self.n = n
+        self.brightness = brightness
+        self.auto_write = auto_write
+        self.buf = [0] * n
+    def __len__(self):
+        return self.n
+    def __getitem__(self, i):
+        return self.buf[i]
+    def __setitem__(self, i, v):
+        if isinstance(i, slice):
+            self.buf[i] = list(v)
+        else:
+            self.buf[i] = v
+        if self.auto_write:
+            self.show()
+    def fill(self, c):
+        self.buf = [c] * self.n
+        if self.auto_write:
+            self.show()
+    def show(self):
+        staroids_sim.state.leds_shown += 1
+    def deinit(self):
+        pass
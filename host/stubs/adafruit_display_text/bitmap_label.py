@@ -0,0 +1,16 @@
+# stand-in for adafruit_display_text.bitmap_label
+class Label:
+    def __init__(self, font, *, text='', color=0xffffff, x=0, y=0, **kwargs):
+        self.font, self.color, self.x, self.y = font, color, x, y
+        self.hidden = False
+        self.text = text
+    @property
+    def text(self):
+        return self._text
+    @text.setter
+    def text(self, t):
+        self._text = t
+        self.bitmap = bytearray(6 * 14 * len(t))  # real one rebuilds its bitmap too
+    @property
+    def bounding_box(self):
+        return (0, -7, 6 * len(self._text), 14)
@@ -0,0 +1,6 @@
+# stand-in for 'adafruit_dotstar'
+from _leds import Strip
+
+class DotStar(Strip):
+    def __init__(self, clock, data, n, *, brightness=1.0, auto_write=True, **kwargs):
+        super().__init__(n, brightness, auto_write)
@@ -0,0 +1,57 @@
+# stand-in for adafruit_imageload, loads palette BMPs (1/4/8-bit, RLE8)
+import struct
+import displayio, staroids_sim
+
+def load(fname, *, bitmap=displayio.Bitmap, palette=displayio.Palette):
+    with open(staroids_sim.path(fname), 'rb') as f:
+        data = f.read()
+    offset, = struct.unpack_from('<I', data, 10)
+    hsize, width, height, _, bpp, comp = struct.unpack_from('<IiiHHI', data, 14)
+    ncolors, = struct.unpack_from('<I', data, 46)
+    ncolors = ncolors or (1 << bpp)
+    pal = palette(ncolors)
+    for i in range(ncolors):
+        b, g, r, _ = data[14 + hsize + i*4 : 18 + hsize + i*4]
+        pal[i] = (r << 16) | (g << 8) | b
+    bmp = bitmap(width, height, ncolors)
+    flip = height > 0
+    height = abs(height)
+    rows = _rle8(data, offset, width, height) if comp == 1 else _raw(data, offset, width, height, bpp)
+    for row, vals in enumerate(rows):
+        y = height - 1 - row if flip else row
+        bmp.pixels[y*width : (y+1)*width] = bytes(vals[:width])
+    return bmp, pal
+
+def _raw(data, offset, width, height, bpp):
+    stride = ((width * bpp + 31) // 32) * 4
+    mask = (1 << bpp) - 1
+    for row in range(height):
+        line = data[offset + row*stride : offset + (row+1)*stride]
+        vals = []
+        for x in range(width):
+            bit = x * bpp
+            vals.append((line[bit // 8] >> (8 - bpp - bit % 8)) & mask)
+        yield vals
+
+def _rle8(data, offset, width, height):
+    row, i = [], offset
+    rows = 0
+    while rows < height:
+        n, v = data[i], data[i+1]
+        i += 2
+        if n:
+            row.extend([v] * n)
+        elif v == 0:   # end of line
+            yield row + [0] * (width - len(row))
+            row, rows = [], rows + 1
+        elif v == 1:   # end of bitmap
+            break
+        elif v == 2:   # delta
+            row.extend([0] * data[i])
+            i += 2
+        else:          # absolute run
+            row.extend(data[i:i+v])
+            i += v + (v & 1)
+    while rows < height:
+        yield row + [0] * (width - len(row))
+        row, rows = [], rows + 1
@@ -0,0 +1,20 @@
+# stand-in for adafruit_seesaw.seesaw talking to a Joy FeatherWing
+import staroids_sim
+import analogio
+
+class Seesaw:
+    INPUT = 0x00
+    OUTPUT = 0x01
+    INPUT_PULLUP = 0x02
+    def __init__(self, i2c_bus, addr=0x49):
+        self.profile = staroids_sim.state.profile
+    def pin_mode_bulk(self, pins, mode):
+        pass
+    def digital_read_bulk(self, pins):
+        val = pins  # pulled up, pressed buttons read low
+        for bit, control in self.profile.seesaw.items():
+            if staroids_sim.state.is_held(control):
+                val &= ~(1 << bit)
+        return val
+    def analog_read(self, pin):
+        return analogio.read(self.profile.analog.get(pin))
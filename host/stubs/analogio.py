@@ -0,0 +1,18 @@
+# stand-in for CircuitPython 'analogio', joystick reads the sim's input script
+import staroids_sim
+
+def read(a):
+    if a is None:
+        return 0
+    if staroids_sim.state.is_held(a.left):
+        return a.low
+    if staroids_sim.state.is_held(a.right):
+        return a.high
+    return a.mid
+
+class AnalogIn:
+    def __init__(self, pin):
+        self.analog = staroids_sim.state.profile.analog.get(pin.name)
+    @property
+    def value(self):
+        return read(self.analog)
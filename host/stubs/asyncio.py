@@ -0,0 +1,56 @@
+# stand-in for CircuitPython 'asyncio' (from the library bundle), on the sim's clock
+# Tasks run in turn by when they next want to wake up. When they're all asleep
+# the sim clock jumps to the first wake-up, like the real one idling.
+import time
+import staroids_sim
+
+_tasks = []
+
+class _Sleep:
+    def __init__(self, secs):
+        self.secs = secs
+    def __await__(self):
+        yield self.secs
+
+def sleep(secs):
+    return _Sleep(secs)
+
+def sleep_ms(ms):
+    return _Sleep(ms / 1000)
+
+class Task:
+    def __init__(self, coro):
+        self.coro = coro
+        self.wake = time.monotonic_ns()
+        self.done = False
+        _tasks.append(self)
+    def __await__(self):
+        while not self.done:
+            yield 0.1
+
+def create_task(coro):
+    return Task(coro)
+
+class _Gather:
+    def __init__(self, tasks):
+        self.tasks = tasks
+    def __await__(self):
+        while not all(t.done for t in self.tasks):
+            yield 0.1
+
+def gather(*tasks):
+    return _Gather(tasks)
+
+def run(coro):
+    main = Task(coro)
+    while not main.done:
+        task = min((t for t in _tasks if not t.done), key=lambda t: t.wake)
+        now = time.monotonic_ns()
+        if task.wake > now:
+            staroids_sim.idle(task.wake - now)
+        try:
+            secs = task.coro.send(None)
+        except StopIteration:
+            task.done = True
+            continue
+        task.wake = time.monotonic_ns() + int(secs * 1e9)
@@ -0,0 +1,10 @@
+# stand-in for CircuitPython 'audiocore'
+class WaveFile:
+    def __init__(self, f, buffer=None):
+        self.f = f
+        self.sample_rate = 11025
+
+class RawSample:
+    def __init__(self, buffer, *, channel_count=1, sample_rate=8000):
+        self.length = len(buffer) // channel_count  # frames
+        self.sample_rate = sample_rate
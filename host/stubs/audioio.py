@@ -0,0 +1,8 @@
+# stand-in for CircuitPython 'audioio'
+class AudioOut:
+    def __init__(self, pin):
+        self.playing = False
+    def play(self, sample, *, loop=False):
+        self.playing = True
+    def stop(self):
+        self.playing = False
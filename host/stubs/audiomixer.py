@@ -0,0 +1,28 @@
+# stand-in for CircuitPython 'audiomixer', a voice is playing for as long as
+# its sample lasts on the sim clock. staroids_sim counts what gets played
+import time
+import staroids_sim
+
+class MixerVoice:
+    def __init__(self):
+        self.end = 0
+        self.level = 1.0
+    def play(self, sample, *, loop=False):
+        if self.playing:
+            staroids_sim.state.sound_cut += 1
+        self.end = time.monotonic() + sample.length / sample.sample_rate
+        staroids_sim.state.sound_plays += 1
+    def stop(self):
+        self.end = 0
+    @property
+    def playing(self):
+        return time.monotonic() < self.end
+
+class Mixer:
+    def __init__(self, voice_count=2, buffer_size=1024, channel_count=2, bits_per_sample=16,
+                 samples_signed=True, sample_rate=8000):
+        self.voice = tuple(MixerVoice() for _ in range(voice_count))
+        self.sample_rate = sample_rate
+    @property
+    def playing(self):
+        return any(v.playing for v in self.voice)
@@ -0,0 +1,55 @@
+# stand-in for CircuitPython 'bitmaptools'
+
+def readinto(bitmap, file, bits_per_pixel, element_size=1, reverse_pixels_in_element=False,
+             swap_bytes_in_element=False, reverse_rows=False):
+    bpp = bits_per_pixel
+    per_elem = element_size * 8 // bpp
+    stride = -(-bitmap.width // per_elem) * element_size
+    mask = (1 << bpp) - 1
+    for row in range(bitmap.height):
+        line = file.read(stride)
+        y = bitmap.height - 1 - row if reverse_rows else row
+        for x in range(bitmap.width):
+            bit = x * bpp
+            bitmap.pixels[y * bitmap.width + x] = (line[bit // 8] >> (8 - bpp - bit % 8)) & mask
+
+def blit(dest, source, x, y, *, x1=0, y1=0, x2=None, y2=None, skip_source_index=None,
+         skip_dest_index=None):
+    x2 = source.width if x2 is None else x2
+    y2 = source.height if y2 is None else y2
+    for sy in range(y1, y2):
+        dy = y + sy - y1
+        if not 0 <= dy < dest.height:
+            continue
+        for sx in range(x1, x2):
+            dx = x + sx - x1
+            v = source.pixels[sy * source.width + sx]
+            if 0 <= dx < dest.width and v != skip_source_index:
+                dest.pixels[dy * dest.width + dx] = v
+
+def fill_region(dest, x1, y1, x2, y2, value):
+    for y in range(max(y1, 0), min(y2, dest.height)):
+        for x in range(max(x1, 0), min(x2, dest.width)):
+            dest.pixels[y * dest.width + x] = value
+
+def rotozoom(dest, source, *, ox=None, oy=None, dest_clip0=None, dest_clip1=None,
+             source_clip0=None, source_clip1=None, px=None, py=None, angle=0.0,
+             scale=1.0, skip_index=None):
+    # nearest neighbor, positive angle turns clockwise on screen (y is down)
+    import math
+    ox = dest.width // 2 if ox is None else ox
+    oy = dest.height // 2 if oy is None else oy
+    px = source.width // 2 if px is None else px
+    py = source.height // 2 if py is None else py
+    x0, y0 = dest_clip0 or (0, 0)
+    x1, y1 = dest_clip1 or (dest.width, dest.height)
+    ca, sa = math.cos(angle) / scale, math.sin(angle) / scale
+    for dy in range(y0, y1):
+        for dx in range(x0, x1):
+            u, v = dx - ox, dy - oy
+            sx = int(round(ca * u + sa * v)) + px
+            sy = int(round(-sa * u + ca * v)) + py
+            if 0 <= sx < source.width and 0 <= sy < source.height:
+                p = source.pixels[sy * source.width + sx]
+                if p != skip_index:
+                    dest.pixels[dy * dest.width + dx] = p
@@ -0,0 +1,20 @@
+# stand-in for CircuitPython 'board' module: pins are just their names,
+# DISPLAY is sized from the sim's current board profile
+import staroids_sim
+import displayio
+
+class Pin:
+    def __init__(self, name):
+        self.name = name
+    def __repr__(self):
+        return 'board.' + self.name
+
+_profile = staroids_sim.state.profile
+DISPLAY = displayio.Display(_profile.width, _profile.height)
+
+def __getattr__(name):
+    if not name.startswith('_'):
+        pin = Pin(name)
+        globals()[name] = pin
+        return pin
+    raise AttributeError(name)
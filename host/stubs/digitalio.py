@@ -0,0 +1,27 @@
+# stand-in for CircuitPython 'digitalio', buttons read the sim's input script
+import staroids_sim
+
+class Pull:
+    UP, DOWN = 'UP', 'DOWN'
+
+class Direction:
+    INPUT, OUTPUT = 'INPUT', 'OUTPUT'
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self.control = staroids_sim.state.profile.pins.get(pin.name)
+        self.pull = None
+        self._value = False
+    def switch_to_input(self, pull=None):
+        self.pull = pull
+    def switch_to_output(self, value=False, drive_mode=None):
+        self._value = value
+    @property
+    def value(self):
+        pressed = self.control is not None and staroids_sim.state.is_held(self.control)
+        return pressed if self.pull != Pull.UP else not pressed
+    @value.setter
+    def value(self, v):
+        self._value = v
+    def deinit(self):
+        pass
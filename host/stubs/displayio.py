@@ -0,0 +1,159 @@
+# stand-in for CircuitPython 'displayio', just enough for staroids
+import array, staroids_sim, time
+
+class Bitmap:
+    def __init__(self, width, height, value_count):
+        self.width, self.height = width, height
+        self.value_count = value_count
+        self.pixels = bytearray(width * height)
+    def __getitem__(self, i):
+        if isinstance(i, tuple):
+            i = i[1] * self.width + i[0]
+        return self.pixels[i]
+    def __setitem__(self, i, v):
+        if isinstance(i, tuple):
+            i = i[1] * self.width + i[0]
+        self.pixels[i] = v
+    def fill(self, v):
+        self.pixels[:] = bytes((v,)) * len(self.pixels)
+    def blit(self, x, y, source, *, x1=0, y1=0, x2=None, y2=None, skip_index=None):
+        import bitmaptools
+        bitmaptools.blit(self, source, x, y, x1=x1, y1=y1, x2=x2, y2=y2,
+                         skip_source_index=skip_index)
+
+class Palette:
+    def __init__(self, color_count):
+        self.colors = [0] * color_count
+        self.transparent = set()
+    def __len__(self):
+        return len(self.colors)
+    def __getitem__(self, i):
+        return self.colors[i]
+    def __setitem__(self, i, c):
+        self.colors[i] = c
+    def make_transparent(self, i):
+        self.transparent.add(i)
+    def make_opaque(self, i):
+        self.transparent.discard(i)
+    def is_transparent(self, i):
+        return i in self.transparent
+
+class TileGrid:
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1,
+                 tile_width=None, tile_height=None, default_tile=0, x=0, y=0):
+        self.bitmap, self.pixel_shader = bitmap, pixel_shader
+        self.width, self.height = width, height
+        self.tile_width = tile_width or bitmap.width
+        self.tile_height = tile_height or bitmap.height
+        self.x, self.y = x, y
+        self.hidden = False
+        self.tiles = [default_tile] * (width * height)
+    def __getitem__(self, i):
+        if isinstance(i, tuple):
+            i = i[1] * self.width + i[0]
+        return self.tiles[i]
+    def __setitem__(self, i, v):
+        if isinstance(i, tuple):
+            i = i[1] * self.width + i[0]
+        self.tiles[i] = v
+
+class Group(list):
+    def __init__(self, *, scale=1, x=0, y=0):
+        super().__init__()
+        self.scale, self.x, self.y = scale, x, y
+        self.hidden = False
+
+class Display:
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.rotation = 0
+        self.auto_refresh = True
+        self.root_group = None
+        self.seen = {}  # id(layer) -> (state, area) as of the last refresh
+    def show(self, group):
+        self.root_group = group
+    def refresh(self, *, target_frames_per_second=None, minimum_frames_per_second=0):
+        now = time.perf_counter_ns()
+        staroids_sim.check_framebuffer(self)
+        staroids_sim.on_refresh(target_frames_per_second, self.dirty_area(), now)
+        return True
+    def dirty_area(self):
+        """how many pixels the real displayio would redraw, roughly"""
+        area, seen = 0, {}
+        for layer in _layers(self.root_group):
+            state, w, h = _state(layer)
+            old = self.seen.get(id(layer))
+            seen[id(layer)] = state
+            if old == state:
+                continue
+            if old is None or old[2] or state[2]:  # new, hidden or shown
+                area += 0 if state[2] else w * h
+            elif old[:2] == state[:2]:
+                area += w * h
+            else:
+                area += min((abs(state[0] - old[0]) + w) * (abs(state[1] - old[1]) + h), 2*w*h)
+        self.seen = seen
+        return min(area, self.width * self.height)
+    def framebuffer(self):
+        """what the screen shows, as 0xRRGGBB per pixel, row by row"""
+        fb = array.array('I', bytes(4 * self.width * self.height))
+        _draw(fb, self.width, self.height, self.root_group, 0, 0, 1)
+        return fb
+
+def _draw(fb, fb_w, fb_h, group, ox, oy, scale):
+    # paint a group's layers in order, transparent pixels let what's under show
+    if group is None or group.hidden:
+        return
+    scale *= group.scale
+    ox, oy = ox + group.x * scale, oy + group.y * scale
+    for layer in group:
+        if isinstance(layer, Group):
+            _draw(fb, fb_w, fb_h, layer, ox, oy, scale)
+        elif not layer.hidden:
+            _draw_tiles(fb, fb_w, fb_h, layer, ox + layer.x * scale, oy + layer.y * scale, scale)
+
+def _draw_tiles(fb, fb_w, fb_h, tg, ox, oy, scale):
+    bmp, pal = tg.bitmap, tg.pixel_shader
+    tw, th = tg.tile_width, tg.tile_height
+    per_row = bmp.width // tw
+    colors = [None if pal.is_transparent(i) else c for i, c in enumerate(pal.colors)]
+    for ty in range(tg.height):
+        for tx in range(tg.width):
+            t = tg.tiles[ty * tg.width + tx]
+            bx, by = (t % per_row) * tw, (t // per_row) * th
+            for y in range(th):
+                src = (by + y) * bmp.width + bx
+                for sy in range(scale):
+                    fy = oy + (ty * th + y) * scale + sy
+                    if not 0 <= fy < fb_h:
+                        continue
+                    row = fy * fb_w
+                    for x in range(tw):
+                        c = colors[bmp.pixels[src + x]]
+                        if c is None:
+                            continue
+                        fx = ox + (tx * tw + x) * scale
+                        for sx in range(scale):
+                            if 0 <= fx + sx < fb_w:
+                                fb[row + fx + sx] = c
+
+def _layers(group):
+    if group is None or group.hidden:
+        return
+    for layer in group:
+        if isinstance(layer, Group):
+            yield from _layers(layer)
+        else:
+            yield layer
+
+def _state(layer):
+    if isinstance(layer, TileGrid):
+        w, h = layer.tile_width * layer.width, layer.tile_height * layer.height
+        return (layer.x, layer.y, layer.hidden, tuple(layer.tiles),
+                tuple(layer.pixel_shader.colors)), w, h
+    # a Label
+    _, _, w, h = layer.bounding_box
+    return (layer.x, layer.y, layer.hidden, layer.text, layer.color), w, h
+
+def release_displays():
+    pass
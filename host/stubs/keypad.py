@@ -0,0 +1,56 @@
+# stand-in for CircuitPython 'keypad', events come from the sim's input script
+import staroids_sim
+
+class Event:
+    def __init__(self, key_number=0, pressed=True, timestamp=0):
+        self.key_number, self.pressed = key_number, pressed
+        self.released = not pressed
+        self.timestamp = timestamp
+
+class EventQueue:
+    def __init__(self, key_count, max_events=64):
+        self.events = []
+        self.max_events = max_events
+        self._overflowed = False
+        # key_number -> control names for the current board
+        self.keymap = {k:c for k,c in staroids_sim.state.profile.keys.items() if k < key_count}
+        staroids_sim.state.key_queues.append(self)
+    def sim_update(self, old_held, new_held, now_ns):
+        for k, control in self.keymap.items():
+            was = staroids_sim.state.is_held(control, old_held)
+            now = staroids_sim.state.is_held(control, new_held)
+            if was != now:
+                if len(self.events) >= self.max_events:
+                    self._overflowed = True
+                else:
+                    self.events.append(Event(k, now, now_ns // 1_000_000))
+    def get(self):
+        return self.events.pop(0) if self.events else None
+    def get_into(self, event):
+        if not self.events:
+            return False
+        e = self.events.pop(0)
+        event.key_number, event.pressed, event.released = e.key_number, e.pressed, e.released
+        event.timestamp = e.timestamp
+        return True
+    @property
+    def overflowed(self):  # read-only, like the real one
+        return self._overflowed
+    def clear(self):
+        self.events.clear()
+        self._overflowed = False
+    def __len__(self):
+        return len(self.events)
+    def __bool__(self):
+        return bool(self.events)
+
+class Keys:
+    def __init__(self, pins, *, value_when_pressed, pull=True, interval=0.02, max_events=64):
+        self.key_count = len(pins)
+        self.events = EventQueue(self.key_count, max_events)
+
+class ShiftRegisterKeys:
+    def __init__(self, *, clock, data, latch, value_to_latch=True, key_count,
+                 value_when_pressed, interval=0.02, max_events=64):
+        self.key_count = key_count
+        self.events = EventQueue(key_count, max_events)
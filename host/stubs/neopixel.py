@@ -0,0 +1,6 @@
+# stand-in for 'neopixel'
+from _leds import Strip
+
+class NeoPixel(Strip):
+    def __init__(self, pin, n, *, bpp=3, brightness=1.0, auto_write=True, pixel_order=None):
+        super().__init__(n, brightness, auto_write)
@@ -0,0 +1,10 @@
+# stand-in for CircuitPython 'supervisor', nothing is ever typed on the serial console
+class _Runtime:
+    serial_bytes_available = 0
+    serial_connected = False
+
+runtime = _Runtime()
+
+def ticks_ms():
+    import staroids_sim
+    return (staroids_sim.state.clock_ns // 1_000_000) & ((1 << 29) - 1)
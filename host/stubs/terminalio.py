@@ -0,0 +1,19 @@
+# stand-in for CircuitPython 'terminalio'
+import collections
+import displayio
+
+Glyph = collections.namedtuple('Glyph', 'bitmap tile_index width height dx dy shift_x shift_y')
+
+class BuiltinFont:
+    # 6x12 glyphs for ' ' to '~' side by side, like the real one's bitmap
+    def __init__(self, w=6, h=12):
+        self.w, self.h = w, h
+        self.bitmap = displayio.Bitmap(w * 95, h, 2)
+    def get_bounding_box(self):
+        return self.w, self.h
+    def get_glyph(self, codepoint):
+        if not 32 <= codepoint < 127:
+            return None
+        return Glyph(self.bitmap, codepoint - 32, self.w, self.h, 0, 0, self.w, 0)
+
+FONT = BuiltinFont()
@@ -0,0 +1,9 @@
+# stand-in for CircuitPython 'touchio'
+import staroids_sim
+
+class TouchIn:
+    def __init__(self, pin):
+        self.control = staroids_sim.state.profile.touch.get(pin.name)
+    @property
+    def value(self):
+        return self.control is not None and staroids_sim.state.is_held(self.control)
@@ -0,0 +1,2 @@
+# staroids -- helper modules for staroids_code.py
+# copy this whole directory to CIRCUITPY along with code.py
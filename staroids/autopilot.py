@@ -0,0 +1,80 @@
+# autopilot.py -- a computer player for staroids, for attract mode & soak tests
+# It plugs in where a board's get_user_input() does and presses the same
+# control bits through Controls.poll(), so to the game (and to a recording)
+# it's just another player. Every frame it finds the nearest asteroid, wrapping
+# around the screen edges like the game does, works out which rotation tile
+# would point the ship at it and turns until the tile the ship is showing
+# (its angle, quantized) is close enough. Then it shoots, and thrusts towards
+# asteroids that are far away. 'aggression' from 0 to 1 sets how often it
+# shoots, how well it aims first and how much it thrusts. It has no randomness
+# of its own and goes by the controls' frame count, so with a seeded game it
+# flies the same every run.
+import math
+from staroids.controls import LEFT, RIGHT, THRUST, FIRE
+
+two_pi = 2 * math.pi
+
+class Autopilot:
+    mask = LEFT | RIGHT | THRUST | FIRE  # the controls it presses
+
+    def __init__(self, ship, stores, aggression=0.5):
+        """fly Thing 'ship' at the asteroids in ThingStores 'stores'"""
+        self.ship = ship
+        self.stores = stores
+        self.flying = True
+        self.set_aggression(aggression)
+        self.target_d = 0  # how far away the asteroid it went after was, pixels
+        self.shots = 0     # times it pressed FIRE
+
+    def set_aggression(self, aggression):
+        a = max(0, min(aggression, 1))
+        self.aggression = a
+        self.fire_every = 30 - int(a * 26)  # frames between pulls of the trigger
+        self.aim = 1 + int(a * 2)           # fire when pointing within this many tiles
+        self.thrust_duty = int(a * 4)       # thrust this many frames out of every 8..
+        st = self.ship.store
+        self.far = (1 - a) * max(st.width, st.height) // 2 + 3 * st.w  # ..at asteroids this far
+
+    def nearest(self):
+        """dx, dy & squared distance from the ship to the nearest asteroid, or None"""
+        ship = self.ship
+        sx, sy = ship.x, ship.y
+        best = None
+        for st in self.stores:
+            x, y, hidden = st.x, st.y, st.hidden
+            ww, wh, wdx, wdy = st.width, st.height, st.wrap_dx, st.wrap_dy
+            for i in range(st.count):
+                if hidden[i]:
+                    continue
+                dx = (st.from_pos(x[i]) - sx + wdx) % ww - wdx
+                dy = (st.from_pos(y[i]) - sy + wdy) % wh - wdy
+                d = dx * dx + dy * dy
+                if best is None or d < best[2]:
+                    best = (dx, dy, d)
+        return best
+
+    def __call__(self, controls):
+        """press the controls for this frame, use as get_user_input(controls)"""
+        held = 0
+        target = self.nearest()
+        if target:
+            dx, dy, d = target
+            self.target_d = int(math.sqrt(d))
+            st, n = self.ship.store, self.ship.num_tiles
+            want = round(math.atan2(dx, -dy) * n / two_pi) % n  # 0 = up, like the sprites
+            off = (want - st.rot[self.ship.i] % n + n // 2) % n - n // 2
+            if off > 0:
+                held |= RIGHT
+            elif off < 0:
+                held |= LEFT
+            frame = controls.frames
+            if abs(off) <= self.aim and frame % self.fire_every < 2:
+                held |= FIRE
+                if not controls.held & FIRE:
+                    self.shots += 1
+            if self.target_d > self.far and frame % 8 < self.thrust_duty:
+                held |= THRUST
+        controls.poll(held, self.mask)
+
+    def report(self):
+        return "aggression %.2f, %d shots" % (self.aggression, self.shots)
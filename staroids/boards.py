@@ -0,0 +1,202 @@
+# boards.py -- board profiles for staroids
+# Each board is a profile in the table below: which os.uname().machine it is,
+# its display & gameplay params (they become the game's settings), where its
+# buttons are, its LEDs and whether it has a speaker. The game picks one
+# with find() and builds the hardware with the make_*() functions, which
+# only import the modules that board actually uses. Porting to a new board
+# should just be a new entry here.
+#
+# input sources, any number per board:
+#   ('keys', (pin names), value_when_pressed, {key number: control bits})  keypad.Keys
+#   ('shift_keys', {key number: control bits})    keypad.ShiftRegisterKeys (PyBadge style)
+#   ('buttons', {pin name: control bits})         digitalio, pulled down, high = pressed
+#   ('touch', pin name, control bits)             touchio pad
+#   ('joystick', pin name, low, high)             analogio X axis, LEFT below low, RIGHT above high
+#   ('seesaw', {button: control bits}, joystick channel, low, high)   Joy FeatherWing on I2C
+# leds:
+#   ('neopixel', pin name, count, brightness) or ('dotstar', count, brightness)
+import board
+from staroids.controls import LEFT, RIGHT, THRUST, FIRE, SELECT
+
+profiles = (
+    # Macropad 128x64 monochrome display, uses 4/5/6 keys for L/T/R
+    ('macropad', {
+        'match': ('macropad',),
+        'params': dict(num_roids=3, num_shots=3, num_exps=2, shot_life=0.4, accel_max_shot=4,
+                       accel_max_ship=0.08, vmax=3, target_fps=30, tile_w=12, turn_rate=0.15,
+                       bg_fname='/imgs/bg_stars_mono.bmp',  # special monochrome starfield
+                       led_base=(0,0,0, 0x111111,0x111111,0x111111, 0,0,0, 0,0,0),  # keys we use are lit
+                       led_keys={LEFT: 3, THRUST|FIRE: 4, RIGHT: 5}),  # and brighter when pressed
+        # KEY4 rotate LEFT, KEY6 rotate RIGHT, KEY5 THRUST/FIRE! (only using 3 keys)
+        'input': (('keys', ['KEY%d' % (n + 1) for n in range(12)], False,
+                   {3: LEFT, 5: RIGHT, 4: THRUST|FIRE}),),
+        'leds': ('neopixel', 'NEOPIXEL', 12, 0.1),
+    }),
+    # FunHouse 240x240 color display, only 3 buttons so L/T/F (when rotated 90-deg)
+    ('funhouse', {
+        'match': ('funhouse',),
+        'params': dict(num_roids=4, num_shots=5, num_exps=3, shot_life=1, accel_max_shot=5,
+                       accel_max_ship=0.2, vmax=5, target_fps=30, tile_w=30, turn_rate=0.15),
+        'input': (('buttons', {'BUTTON_UP': LEFT, 'BUTTON_DOWN': RIGHT,
+                               'BUTTON_SELECT': THRUST|FIRE}),),
+        'leds': ('dotstar', 5, 0.1),
+    }),
+    # Pybadge 160x128 color display, D-pad L/R for L/R, A for Thrust/Fire, SELECT for rainbowing
+    ('pybadge', {
+        'match': ('pybadge',),
+        'params': dict(num_roids=3, num_shots=3, num_exps=2, shot_life=0.5, accel_max_shot=3,
+                       accel_max_ship=0.06, vmax=3, target_fps=30, tile_w=20, turn_rate=0.12,
+                       rainbow=True),
+        'input': (('shift_keys', {7: LEFT, 4: RIGHT, 1: THRUST|FIRE, 3: SELECT}),),
+        'leds': ('neopixel', 'NEOPIXEL', 5, 0.1),
+        'speaker': True,
+    }),
+    # Pygamer 160x128 color display, analog pad L/R for L/R, A for Thrust/Fire
+    ('pygamer', {
+        'match': ('pygamer',),
+        'params': dict(num_roids=3, num_shots=3, num_exps=2, shot_life=0.5, accel_max_shot=3,
+                       accel_max_ship=0.06, vmax=3, target_fps=30, tile_w=20, turn_rate=0.12,
+                       rainbow=True),
+        'input': (('shift_keys', {1: THRUST|FIRE, 3: SELECT}),
+                  ('joystick', 'JOYSTICK_X', 1000, 55000)),
+        'leds': ('neopixel', 'NEOPIXEL', 5, 0.1),
+        'speaker': True,
+    }),
+    # Clue 240x240 color display, A/B for L/R, touch pad 2 (D2) for Thrust/Fire
+    ('clue', {
+        'match': ('clue',),
+        'params': dict(num_roids=3, num_shots=3, num_exps=2, shot_life=0.5, accel_max_shot=3,
+                       accel_max_ship=0.06, vmax=3, target_fps=30, tile_w=20, turn_rate=0.15),
+        'input': (('keys', ('BUTTON_A', 'BUTTON_B'), False, {0: LEFT, 1: RIGHT}),
+                  ('touch', 'D2', THRUST|FIRE)),
+        'leds': ('neopixel', 'NEOPIXEL', 1, 0.1),
+    }),
+    # PyPortal 320x240 display + Joy Featherwing over I2C STEMMA port.
+    # X-joystick for L/R, A = fire, B = thrust, SEL for rainbowing
+    ('pyportal', {
+        'match': ('pyportal',),
+        'params': dict(num_roids=6, num_shots=3, num_exps=3, shot_life=2, accel_max_shot=3,
+                       accel_max_ship=0.06, vmax=3, target_fps=30, tile_w=20, turn_rate=0.12,
+                       bg_fname='/imgs/bg_starfield_320x240.bmp',  # hubble star field big
+                       rainbow=True, rainbow_bg=True,
+                       input_hz=15),  # each read is two I2C trips that stall everything
+        'input': (('seesaw', {6: FIRE, 7: THRUST, 14: SELECT}, 3, 500, 700),),
+        'leds': ('neopixel', 'NEOPIXEL', 1, 1),
+        'speaker': True,
+    }),
+    # a desktop computer running the stand-in modules in host/stubs, five keys
+    # for L/R/thrust/fire/select. Doesn't have to stick to any board's limits
+    ('desktop', {
+        'match': ('x86_64', 'amd64', 'arm64', 'aarch64'),
+        'params': dict(num_roids=6, num_shots=5, num_exps=3, shot_life=1, accel_max_shot=4,
+                       accel_max_ship=0.1, vmax=4, target_fps=30, tile_w=30, turn_rate=0.15,
+                       bg_fname='/imgs/bg_starfield_320x240.bmp', rainbow=True, rainbow_bg=True),
+        'input': (('keys', ('D0', 'D1', 'D2', 'D3', 'D4'), False,
+                   {0: LEFT, 1: RIGHT, 2: THRUST, 3: FIRE, 4: SELECT}),),
+        'leds': ('neopixel', 'NEOPIXEL', 1, 0.1),
+    }),
+)
+
+def find(machine):
+    """returns (name, profile) of the board os.uname().machine 'machine' is"""
+    machine = machine.lower()
+    for name, profile in profiles:
+        for m in profile['match']:
+            if m in machine:
+                return name, profile
+    raise OSError("unknown board")
+
+def make_input(sources):
+    """returns get_user_input(controls) that reads all of a profile's input sources"""
+    readers = [make_reader(*src) for src in sources]
+    def get_user_input(controls):
+        for read in readers:
+            read(controls)
+    return get_user_input
+
+def make_reader(kind, *args):
+    if kind == 'keys':
+        import keypad
+        pins, value_when_pressed, keymap = args
+        keys = keypad.Keys([getattr(board, p) for p in pins],
+                           value_when_pressed=value_when_pressed, pull=True)
+        return lambda controls: controls.drain(keys.events, keymap)
+    if kind == 'shift_keys':
+        import keypad
+        keymap, = args
+        keys = keypad.ShiftRegisterKeys(clock=board.BUTTON_CLOCK, data=board.BUTTON_OUT,
+                                        latch=board.BUTTON_LATCH, key_count=8,
+                                        value_when_pressed=True)
+        return lambda controls: controls.drain(keys.events, keymap)
+    if kind == 'buttons':
+        import digitalio
+        buttons, mask = [], 0
+        for pin, bits in args[0].items():
+            b = digitalio.DigitalInOut(getattr(board, pin))
+            b.switch_to_input(pull=digitalio.Pull.DOWN)
+            buttons.append((b, bits))
+            mask |= bits
+        def read(controls):
+            held = 0
+            for b, bits in buttons:
+                if b.value:
+                    held |= bits
+            controls.poll(held, mask)
+        return read
+    if kind == 'touch':
+        import touchio
+        pin, bits = args
+        pad = touchio.TouchIn(getattr(board, pin))
+        return lambda controls: controls.poll(bits if pad.value else 0, bits)
+    if kind == 'joystick':
+        import analogio
+        pin, low, high = args
+        joystick_x = analogio.AnalogIn(getattr(board, pin))
+        def read(controls):
+            x = joystick_x.value
+            controls.poll(RIGHT if x > high else LEFT if x < low else 0, LEFT|RIGHT)
+        return read
+    if kind == 'seesaw':
+        import busio
+        from adafruit_seesaw.seesaw import Seesaw
+        buttons, channel, low, high = args
+        ss = Seesaw(busio.I2C(board.SCL, board.SDA))
+        button_mask, mask = 0, LEFT|RIGHT
+        for b, bits in buttons.items():
+            button_mask |= 1 << b
+            mask |= bits
+        ss.pin_mode_bulk(button_mask, ss.INPUT_PULLUP)
+        pairs = tuple(buttons.items())
+        def read(controls):
+            pins = ss.digital_read_bulk(button_mask)
+            held = 0
+            for b, bits in pairs:
+                if not (pins & 1 << b):  # pressed pulls it low
+                    held |= bits
+            x = ss.analog_read(channel)
+            if x > high: held |= RIGHT
+            if x < low: held |= LEFT
+            controls.poll(held, mask)
+        return read
+    raise ValueError("unknown input: " + kind)
+
+def make_leds(spec):
+    """the board's NeoPixels or DotStars, written only on show()"""
+    if spec[0] == 'dotstar':
+        import adafruit_dotstar
+        count, brightness = spec[1:]
+        return adafruit_dotstar.DotStar(board.DOTSTAR_CLOCK, board.DOTSTAR_DATA, count,
+                                        brightness=brightness, auto_write=False)
+    import neopixel
+    pin, count, brightness = spec[1:]
+    return neopixel.NeoPixel(getattr(board, pin), count, brightness=brightness, auto_write=False)
+
+speaker_enable = None
+
+def make_audio():
+    """turn on the speaker amp, returns an audioio.AudioOut for it"""
+    global speaker_enable
+    import audioio, digitalio
+    speaker_enable = digitalio.DigitalInOut(board.SPEAKER_ENABLE)
+    speaker_enable.switch_to_output(value=True)
+    return audioio.AudioOut(board.SPEAKER)
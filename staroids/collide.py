@@ -0,0 +1,101 @@
+# collide.py -- collision for staroids
+# Broad phase: a spatial hash. The screen is cut into square cells, each with a
+# bucket of the Things whose center is in it. Buckets are updated only when a
+# Thing changes cells, and a query only looks at the 3x3 cells around a point.
+# The screen wraps around, so cells on one edge are neighbors of cells on the
+# other edge.
+# Narrow phase: the sprites are outlines, so each rotation tile gets the span
+# (leftmost & rightmost lit pixel) of each of its rows. Sprite banks have them
+# already (tools/make_spritebank.py), sheets loaded from BMPs get them worked
+# out here when they're loaded. ThingStore.is_hit() compares spans row by row, after
+# a bounding box test passes (see staroids/things.py).
+import array
+
+no_span = (255, 0)  # lo > hi, row has nothing lit
+
+def tile_spans(bitmap, x0, tile_w, spans, k):
+    """put the row spans of the tile at 'x0' in 'bitmap' into bytearray 'spans' at 'k'"""
+    for y in range(tile_w):
+        lo, hi = no_span
+        for x in range(tile_w):
+            if bitmap[x0 + x, y]:
+                lo = x
+                break
+        if lo < tile_w:
+            for x in range(tile_w - 1, lo - 1, -1):
+                if bitmap[x0 + x, y]:
+                    hi = x
+                    break
+        spans[k], spans[k + 1] = lo, hi
+        k += 2
+
+def sheet_spans(bitmap, tile_w, num_tiles):
+    """row spans of the first 'num_tiles' tiles of a sprite sheet, 2 bytes a row"""
+    spans = bytearray(num_tiles * tile_w * 2)
+    for t in range(num_tiles):
+        tile_spans(bitmap, t * tile_w, tile_w, spans, t * tile_w * 2)
+    return spans
+
+class SpatialHash:
+    def __init__(self, width, height, cell):
+        # 'cell' must be at least as big as the hitbox so hits are never
+        # more than one cell away
+        self.cell = cell
+        self.cols = cols = -(-width // cell)  # ceiling divide
+        self.rows = rows = -(-height // cell)
+        self.buckets = [[] for _ in range(cols * rows)]
+        # 9 neighbor bucket indices per cell (wrapping), precomputed so queries
+        # don't do any modulo math. Dupes (on tiny grids) are made -1 & skipped
+        self.neighbors = array.array('h', [-1] * (cols * rows * 9))
+        for r in range(rows):
+            for c in range(cols):
+                k = (r * cols + c) * 9
+                seen = []
+                for dr in (-1, 0, 1):
+                    for dc in (-1, 0, 1):
+                        b = ((r + dr) % rows) * cols + (c + dc) % cols
+                        if b not in seen:
+                            seen.append(b)
+                            self.neighbors[k] = b
+                        k += 1
+
+    def cell_of(self, thing):
+        # from the store's arrays, not the TileGrid: a shot launched this tick
+        # hasn't been drawn there yet, but is_hit() already sees it there
+        st, i = thing.store, thing.i
+        return ((st.pixel(st.x[i]) % st.width) // self.cell +
+                (st.pixel(st.y[i]) % st.height) // self.cell * self.cols)
+
+    def move(self, thing):
+        """call after 'thing' has moved to keep its bucket current"""
+        i = self.cell_of(thing)
+        if i != thing.cell:
+            if thing.cell >= 0:
+                self.buckets[thing.cell].remove(thing)
+            self.buckets[i].append(thing)
+            thing.cell = i
+
+    def update(self, store):
+        """move all the visible Things in a ThingStore to their current buckets"""
+        hidden, things = store.hidden, store.things
+        for i in range(store.count):
+            if not hidden[i]:
+                self.move(things[i])
+
+    def remove(self, thing):
+        if thing.cell >= 0:
+            self.buckets[thing.cell].remove(thing)
+            thing.cell = -1
+
+    def first_hit(self, thing):
+        """return first Thing in the hash that 'thing' hits, or None"""
+        buckets, nb = self.buckets, self.neighbors
+        store, i = thing.store, thing.i
+        k = self.cell_of(thing) * 9
+        for j in range(k, k + 9):
+            b = nb[j]
+            if b >= 0:
+                for other in buckets[b]:
+                    if other.store.is_hit(other.i, store, i):  # other.is_hit(thing)
+                        return other
+        return None
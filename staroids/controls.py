@@ -0,0 +1,140 @@
+# controls.py -- player input for staroids, the same on every board
+# Each board turns its buttons into control bits (LEFT, RIGHT, ...). Keypad
+# boards hand over their whole event queue each frame with drain(), so quick
+# taps between frames aren't lost or late. Buttons that can only be read
+# (digitalio, touchio, joysticks) go through poll(), which turns changes into
+# events too. Every event lands in a buffer made at startup, with a timestamp.
+# The event stream can be recorded to a file and replayed later instead of
+# the buttons, for repeatable benchmarks. Records are 9 bytes, little-endian:
+#   u32 frame number, u32 timestamp (ms), u8 control bits | 0x80 if pressed
+import array, struct
+import supervisor
+
+LEFT, RIGHT, THRUST, FIRE, SELECT = 1, 2, 4, 8, 16
+PRESSED = 0x80
+ticks_mask = (1 << 29) - 1  # supervisor.ticks_ms() wraps around at 2**29
+
+class Controls:
+    def __init__(self, size=32, record=None, replay=None):
+        self.codes = bytearray(size)  # this frame's events: control bits | PRESSED
+        self.times = array.array('L', [0] * size)  # and when they happened, ticks_ms
+        self.count = 0       # events this frame
+        self.dropped = 0     # events lost because the buffer or keypad queue was full
+        self.held = 0        # control bits held down right now
+        self.pressed = 0     # control bits pressed at any point since consume()
+        self.frames = 0
+        self.lat_sum, self.lat_max, self.lat_count = 0, 0, 0  # press -> frame shown, ms
+        self.unshown = 0     # presses not on screen yet
+        self.unshown_t = 0   # when the first of them happened
+        self.unshown_dt = 0  # and how much later than that the others were, added up
+        self.event = None    # keypad.Event for drain(), made on first use
+        self.rec = open(record, 'wb') if record else None
+        self.play = open(replay, 'rb') if replay else None
+        self.buf = bytearray(9)
+        self.next_frame = -1  # frame number of the replay record in buf
+        if self.play:
+            self._read()
+
+    def frame(self):
+        """start a new frame (or input poll), call before the board reads its buttons"""
+        self.frames += 1
+        self.count = 0
+        if self.rec and self.frames % 64 == 0:
+            self.rec.flush()
+        if self.play:
+            while self.next_frame == self.frames:
+                frame, t, code = struct.unpack('<IIB', self.buf)
+                self._apply(code, t)
+                self._read()
+
+    def drain(self, events, keymap):
+        """take every event in keypad EventQueue 'events', keymap is
+        {key_number: control bits}"""
+        if self.event is None:
+            import keypad
+            self.event = keypad.Event()
+        ev = self.event
+        while events.get_into(ev):
+            bits = keymap.get(ev.key_number, 0)
+            if bits and not self.play:
+                self.add(bits, ev.pressed, ev.timestamp)
+        if events.overflowed:  # read-only, only clear() resets it (the queue's empty now anyway)
+            events.clear()
+            self.dropped += 1
+
+    def poll(self, held, mask):
+        """for buttons that are read, not queued: 'held' are the bits in 'mask' down now"""
+        changed = (self.held ^ held) & mask
+        if changed and not self.play:
+            now = supervisor.ticks_ms()
+            down = changed & held
+            if down:
+                self.add(down, True, now)
+            if changed & ~held:
+                self.add(changed & ~held, False, now)
+
+    def add(self, bits, pressed, timestamp):
+        code = bits | (PRESSED if pressed else 0)
+        if self.rec:
+            struct.pack_into('<IIB', self.buf, 0, self.frames, timestamp, code)
+            self.rec.write(self.buf)
+        self._apply(code, timestamp)
+
+    def _apply(self, code, timestamp):
+        if self.count == len(self.codes):
+            self.dropped += 1
+        else:
+            self.codes[self.count] = code
+            self.times[self.count] = timestamp
+            self.count += 1
+        if code & PRESSED:
+            self.held |= code & ~PRESSED
+            self.pressed |= code & ~PRESSED
+            if not self.play:
+                if not self.unshown:
+                    self.unshown_t = timestamp
+                self.unshown_dt += (timestamp - self.unshown_t) & ticks_mask
+                self.unshown += 1
+        else:
+            self.held &= ~code
+
+    def seek(self, frame, held):
+        """carry on from frame number 'frame' with 'held' down, like after
+        loading a snapshot. A replay skips what happened up to then"""
+        self.frames, self.held = frame, held
+        if self.play:
+            while 0 <= self.next_frame <= frame:
+                self._read()
+
+    def _read(self):
+        if self.play.readinto(self.buf) == 9:
+            self.next_frame = struct.unpack_from('<I', self.buf)[0]
+        else:
+            self.next_frame = -1  # replay done, nothing more happens
+
+    def down(self, bits):
+        """True if any of 'bits' is held, or was tapped since consume()"""
+        return bool((self.held | self.pressed) & bits)
+
+    def consume(self):
+        """the game has acted on the taps so far, forget them"""
+        self.pressed = 0
+
+    def turning(self, rate):
+        return (self.down(RIGHT) - self.down(LEFT)) * rate
+
+    def shown(self):
+        """call once presses so far are on screen, adds up input latency"""
+        if not self.unshown:
+            return
+        lat = (supervisor.ticks_ms() - self.unshown_t) & ticks_mask  # the oldest one's
+        self.lat_sum += lat * self.unshown - self.unshown_dt
+        self.lat_count += self.unshown
+        if lat > self.lat_max:
+            self.lat_max = lat
+        self.unshown, self.unshown_dt = 0, 0
+
+    def close(self):
+        for f in (self.rec, self.play):
+            if f:
+                f.close()
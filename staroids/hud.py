@@ -0,0 +1,96 @@
+# hud.py -- score & stats readouts for staroids, without allocating
+# Numbers are TileGrids straight onto the glyphs of the built-in terminalio
+# font (one tile per character), so showing a new number is just changing a
+# few tile indexes: no strings, no new bitmaps, nothing for the GC to clean up
+# in the middle of an explosion. Only digits that changed are touched and
+# marked dirty. The optional stats line shows frames per second, frame time
+# in ms and gc.mem_free() in kB, from the frame times the main loop measures.
+import gc
+import displayio, terminalio
+
+class Number:
+    """a 'digits' long number at x,y, after a 'prefix' character. With 'point'
+    the last that many digits are after a decimal point"""
+    def __init__(self, palette, x, y, digits=3, prefix=None, point=0, font=terminalio.FONT):
+        w, h = font.get_bounding_box()[:2]
+        tile = lambda c: font.get_glyph(ord(c)).tile_index
+        self.zero = bytearray(tile(c) for c in '0123456789')  # glyph tile of each digit
+        self.digits, self.point = digits, point
+        self.most = 10 ** digits - 1
+        width = (1 if prefix else 0) + digits + (1 if point else 0)
+        self.tg = displayio.TileGrid(font.bitmap, pixel_shader=palette, width=width, height=1,
+                                     tile_width=w, tile_height=h, x=x, y=y, default_tile=tile(' '))
+        if prefix:
+            self.tg[0] = tile(prefix)
+        if point:
+            self.tg[width - point - 1] = tile('.')
+        self.value = -1
+        self.glyph_area = w * h
+        self.width, self.height = width * w, h
+
+    def set(self, n):
+        """show number 'n' (at most all 9s, if it doesn't fit), returns pixels changed"""
+        n = min(n, self.most)
+        if n == self.value:
+            return 0
+        self.value = n
+        tg, zero, point = self.tg, self.zero, self.point
+        changed = 0
+        col = self.tg.width - 1
+        for d in range(self.digits):
+            if point and d == point:
+                col -= 1  # skip the '.'
+            t = zero[n % 10]
+            n //= 10
+            if tg[col] != t:
+                tg[col] = t
+                changed += 1
+            col -= 1
+        return changed * self.glyph_area
+
+
+class HUD:
+    def __init__(self, screen, dirty, width, color=0x999999, stats=False, every=15):
+        """score at the top left of 'screen', plus fps, frame ms & free kB at the
+        top right if 'stats', updated every 'every' frames"""
+        self.dirty = dirty
+        self.palette = displayio.Palette(2)
+        self.palette.make_transparent(0)
+        self.palette[1] = color
+        self.score = Number(self.palette, 5, 0, digits=4)  # splitting asteroids score fast
+        self.score.set(0)
+        screen.append(self.score.tg)
+        self.stats = None
+        if stats:
+            x = width
+            self.stats = []
+            for digits, prefix, point in ((4, 'K', 0), (4, 'T', 1), (3, 'F', 0)):  # right to left
+                num = Number(self.palette, 0, 0, digits, prefix, point)
+                x -= num.width + 4
+                num.tg.x = x
+                screen.append(num.tg)
+                self.stats.append(num)
+            self.mem, self.ms, self.fps = self.stats
+        # pixels redrawn when the color changes (rainbow mode)
+        self.area = sum(num.width * num.height for num in [self.score] + (self.stats or []))
+        self.every = every
+        self.frames, self.sum_us = 0, 0
+        dirty.mark(self.area)  # it's all new
+
+    def set_score(self, n):
+        self.dirty.mark(self.score.set(n))
+
+    def frame(self, frame_ns):
+        """add a frame that took 'frame_ns', update the stats every so often"""
+        if not self.stats:
+            return
+        self.frames += 1
+        self.sum_us += frame_ns // 1000
+        if self.frames < self.every:
+            return
+        us = max(self.sum_us, 1)
+        area = self.fps.set(min(self.frames * 1_000_000 // us, 999))
+        area += self.ms.set(min(us // self.frames // 100, 9999))  # tenths of ms
+        area += self.mem.set(min(gc.mem_free() // 1024, 9999))
+        self.dirty.mark(area)
+        self.frames, self.sum_us = 0, 0
@@ -0,0 +1,113 @@
+# lights.py -- LED effects for staroids, one strip update per frame at most
+# The board's NeoPixels/DotStars are made with auto_write=False and only
+# Lights writes to them. Effects are timelines: flash() lights LEDs in a color,
+# holds it a bit, then fades it out in a few steps. On top of each board's
+# resting colors ('base') and its key LEDs lit while their controls are held
+# ('keys'), all from data in the board params. Layers are merged by taking the
+# brighter of each red, green & blue. The strip is only written and show()n
+# when the merged colors differ from what it shows now.
+import array
+
+fade_steps = 4  # a fade changes the LEDs this many times, not every frame
+
+def scale(c, level):
+    """color 'c' at level/fade_steps brightness"""
+    return ((((c >> 16) & 0xff) * level // fade_steps) << 16 |
+            (((c >> 8) & 0xff) * level // fade_steps) << 8 |
+            (c & 0xff) * level // fade_steps)
+
+def brighter(a, b):
+    """per channel max of colors a & b"""
+    return (max(a & 0xff0000, b & 0xff0000) | max(a & 0xff00, b & 0xff00) |
+            max(a & 0xff, b & 0xff))
+
+class Lights:
+    def __init__(self, strip, base=None, keys=None, key_color=0x444444, layers=2):
+        """'strip' is a NeoPixel/DotStar with auto_write=False. 'base' are the
+        resting colors of each LED (default all off), 'keys' is
+        {control bits: LED number} for LEDs that light up while held"""
+        self.strip = strip
+        n = len(strip)
+        self.base = array.array('L', base or [0] * n)
+        self.keys = tuple((keys or {}).items())
+        self.key_color = key_color
+        self.shown = array.array('L', [0xffffffff] * n)  # what the strip shows, nothing yet
+        self.next = array.array('L', [0] * n)
+        # flash layers: color, which LEDs (bit per LED), start, hold & fade times
+        self.color = array.array('L', [0] * layers)
+        self.mask = array.array('L', [0] * layers)
+        self.start = array.array('f', [0] * layers)
+        self.hold = array.array('f', [0] * layers)
+        self.fade = array.array('f', [0] * layers)
+        self.level = bytearray(layers)  # fade level last drawn, 0 = layer done
+        self.held = 0
+        self.changed = True   # something's different since the last update()
+        self.updates, self.shows = 0, 0
+
+    def flash(self, color, now, hold=0.1, fade=0.3, mask=0xffffffff):
+        """light the LEDs in 'mask' in 'color' at 'now', for 'hold' secs then fade out over 'fade'"""
+        i = 0
+        for j in range(len(self.level)):  # a free layer, or the oldest
+            if not self.level[j]:
+                i = j
+                break
+            if self.start[j] < self.start[i]:
+                i = j
+        self.color[i], self.mask[i] = color, mask
+        self.start[i], self.hold[i], self.fade[i] = now, hold, fade
+        self.level[i] = fade_steps
+        self.changed = True
+
+    def held_keys(self, bits):
+        """control bits held now, for the key LEDs"""
+        if bits != self.held:
+            self.held = bits
+            self.changed = True
+
+    def clear(self):
+        """stop all flashes, back to the resting colors"""
+        for j in range(len(self.level)):
+            if self.level[j]:
+                self.level[j] = 0
+                self.changed = True
+
+    def update(self, now):
+        """merge the layers for 'now' and show() them if anything changed"""
+        self.updates += 1
+        level = self.level
+        for j in range(len(level)):  # move each flash along its timeline
+            if level[j]:
+                t = now - self.start[j] - self.hold[j]
+                lv = fade_steps if t < 0 else fade_steps - int(t * fade_steps / self.fade[j])
+                lv = max(lv, 0)
+                if lv != level[j]:
+                    level[j] = lv
+                    self.changed = True
+        if not self.changed:
+            return
+        self.changed = False
+        nxt, base = self.next, self.base
+        for i in range(len(nxt)):
+            nxt[i] = base[i]
+        for bits, led in self.keys:
+            if self.held & bits:
+                nxt[led] = brighter(nxt[led], self.key_color)
+        for j in range(len(level)):
+            if level[j]:
+                c, mask = scale(self.color[j], level[j]), self.mask[j]
+                for i in range(len(nxt)):
+                    if mask & (1 << i):
+                        nxt[i] = brighter(nxt[i], c)
+        strip, shown = self.strip, self.shown
+        dirty = False
+        for i in range(len(nxt)):
+            if nxt[i] != shown[i]:
+                shown[i] = nxt[i]
+                strip[i] = nxt[i]
+                dirty = True
+        if dirty:
+            strip.show()
+            self.shows += 1
+
+    def report(self):
+        return "%d shows in %d updates" % (self.shows, self.updates)
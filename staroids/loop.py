@@ -0,0 +1,83 @@
+# loop.py -- fixed-timestep game loop helpers for staroids
+# FixedStep says how many physics ticks are due each time around the main
+# loop, so the game runs at the same speed no matter how long a display
+# refresh takes. Governor watches frame times and picks a "quality level"
+# that the game can use to shed load when it can't keep up.
+import time
+
+class FixedStep:
+    def __init__(self, tick_hz=30, max_ticks=3, lockstep=False):
+        self.tick_ns = 1_000_000_000 // tick_hz
+        self.max_ticks = max_ticks  # most ticks to catch up in one frame
+        self.lockstep = lockstep    # exactly one tick a frame, whatever the time
+        self.last_ns = time.monotonic_ns()
+        self.time_ns = 0     # game time, only moves forward by whole ticks
+        self.owed_ns = 0     # real time not yet turned into ticks
+        self.frame_ns = 0    # how long the last frame took
+        self.dropped = 0     # ticks thrown away because we were too far behind
+
+    def due(self):
+        """call once per frame, returns how many ticks to run now"""
+        now = time.monotonic_ns()
+        self.frame_ns = now - self.last_ns
+        self.last_ns = now
+        if self.lockstep:  # repeatable runs: game time is frames, not the clock
+            return 1
+        self.owed_ns += self.frame_ns
+        n = self.owed_ns // self.tick_ns
+        if n > self.max_ticks:  # too far behind, let the game slow down instead
+            self.dropped += n - self.max_ticks
+            n = self.max_ticks
+            self.owed_ns = 0
+        else:
+            self.owed_ns -= n * self.tick_ns
+        return n
+
+    def tick(self):
+        """advance game time one tick, returns game time in seconds"""
+        self.time_ns += self.tick_ns
+        return self.time_ns / 1e9
+
+    @property
+    def ticks(self):
+        return self.time_ns // self.tick_ns
+
+    def ticks_of(self, secs):
+        """game time 'secs' (from tick()) as a tick count"""
+        return round(secs * 1e9 / self.tick_ns)
+
+    def time_of(self, ticks):
+        """tick count back to game time, exactly what tick() returned then"""
+        return ticks * self.tick_ns / 1e9
+
+    def until_next(self):
+        """seconds until the next tick is due, as of the last due()"""
+        return max(self.tick_ns - self.owed_ns, 0) / 1e9
+
+
+class Governor:
+    def __init__(self, target_fps, max_level, hold=30):
+        self.budget_ns = 1_000_000_000 // target_fps
+        self.max_level = max_level
+        self.hold = hold     # frames to wait after a change before the next one
+        self.avg_ns = self.budget_ns
+        self.level = 0       # 0 = everything on, higher = less stuff
+        self.count = 0
+
+    def update(self, frame_ns):
+        """feed it the last frame time, returns the quality level to use"""
+        self.avg_ns += (frame_ns - self.avg_ns) // 8  # rolling average
+        self.count += 1
+        if self.count < self.hold:
+            return self.level
+        if self.avg_ns > self.budget_ns * 6 // 5:  # more than 20% over budget
+            if self.level < self.max_level:
+                self.level += 1
+                self.count = 0
+        # refresh() waits out the rest of a frame, so frame times never drop far
+        # below budget. Being on budget for a good while means try one better
+        elif self.avg_ns < self.budget_ns * 21 // 20 and self.count > self.hold * 4:
+            if self.level > 0:
+                self.level -= 1
+            self.count = 0
+        return self.level
@@ -0,0 +1,59 @@
+# palettes.py -- palette color animation for staroids (rainbow mode)
+# The colors are worked out once at startup into a table, so animating is
+# just looking up an index from the time. Each target (a palette entry or a
+# label color) has its own update rate and is only written when its index
+# really changed. Changing a color redraws everything drawn with it, so each
+# target also says how many pixels that is. It goes on the DirtyTracker, and
+# when the frame budget is tight the expensive ones (the background) are left
+# alone until things are better.
+import array
+import rainbowio
+
+class PaletteAnim:
+    def __init__(self, dirty, steps=64, period=2.55, max_area=None):
+        """'steps' colors around the color wheel, once every 'period' seconds.
+        targets costing more than 'max_area' pixels are skipped when tight"""
+        self.dirty = dirty
+        self.table = array.array('L', [rainbowio.colorwheel(i * 256 // steps) for i in range(steps)])
+        self.rate = steps / period  # table steps per second
+        self.max_area = dirty.screen_area // 4 if max_area is None else max_area
+        self.objs = []   # palette or label of each target
+        self.index = array.array('b')  # palette entry to set, -1 for a label's color
+        self.every = array.array('f')  # seconds between updates
+        self.last = array.array('f')   # when it was last updated
+        self.shown = array.array('h')  # table index it has now, -1 = none yet
+        self.area = array.array('L')   # pixels redrawn when it changes
+        self.writes, self.skipped = 0, 0
+
+    def add(self, obj, index=1, hz=30, area=0):
+        """animate palette entry 'index' of 'obj' (or a label's color if index
+        is None) up to 'hz' times a second, changing it redraws 'area' pixels"""
+        self.objs.append(obj)
+        self.index.append(-1 if index is None else index)
+        self.every.append(1 / hz)
+        self.last.append(-1000)
+        self.shown.append(-1)
+        self.area.append(area)
+
+    def update(self, now, tight=False):
+        """move every target due to the color for 'now', but not the
+        expensive ones if 'tight'"""
+        table = self.table
+        c = int(now * self.rate) % len(table)
+        every, last, shown, area = self.every, self.last, self.shown, self.area
+        for i in range(len(self.objs)):
+            if shown[i] == c or now - last[i] < every[i]:
+                continue
+            if tight and area[i] > self.max_area:
+                self.skipped += 1
+                continue
+            last[i], shown[i] = now, c
+            if self.index[i] < 0:
+                self.objs[i].color = table[c]
+            else:
+                self.objs[i][self.index[i]] = table[c]
+            self.dirty.mark(area[i])
+            self.writes += 1
+
+    def report(self):
+        return "%d writes, %d skipped" % (self.writes, self.skipped)
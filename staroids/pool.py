@@ -0,0 +1,62 @@
+# pool.py -- fixed-size pools of short-lived Things (shots, explosions, ...)
+# A Pool hands out the hidden slots of a ThingStore with spawn() and takes
+# them back with despawn() or when their lifetime runs out. Free slots are
+# kept on a stack, so spawning never searches and never allocates: all the
+# Things & TileGrids are made at startup. 'high' remembers the most ever in
+# use and 'full' how many spawns found no free slot, to help pick a size.
+import array
+
+class Pool:
+    def __init__(self, store):
+        self.store = store
+        size = store.count  # all its Things, hidden
+        self.free = array.array('h', range(size - 1, -1, -1))  # stack of free slots
+        self.nfree = size
+        self.life = array.array('f', [0] * size)  # seconds each live Thing gets
+        self.live = 0   # in use now
+        self.high = 0   # most ever in use at once
+        self.full = 0   # spawns that found no free slot
+        self.spawns = 0
+
+    def spawn(self, now, life):
+        """show a free Thing, born at 'now' for 'life' seconds.
+        returns its slot, or -1 if the pool is all in use"""
+        if not self.nfree:
+            self.full += 1
+            return -1
+        self.nfree -= 1
+        i = self.free[self.nfree]
+        store = self.store
+        store.time[i] = now
+        self.life[i] = life
+        store.hide(i, False)
+        self.live += 1
+        self.spawns += 1
+        if self.live > self.high:
+            self.high = self.live
+        return i
+
+    def despawn(self, i):
+        """hide Thing i and give its slot back, does nothing if it's not live"""
+        if self.store.hidden[i]:
+            return
+        self.store.hide(i)
+        self.free[self.nfree] = i
+        self.nfree += 1
+        self.live -= 1
+
+    def age_out(self, now):
+        """despawn Things that have lived out their life"""
+        if not self.live:
+            return
+        times, life, hidden = self.store.time, self.life, self.store.hidden
+        for i in range(self.store.count):
+            if not hidden[i] and now - times[i] > life[i]:
+                self.despawn(i)
+
+    def clear(self):
+        for i in range(self.store.count):
+            self.despawn(i)
+
+    def report(self):
+        return "%d/%d high, %d full, %d spawns" % (self.high, self.store.count, self.full, self.spawns)
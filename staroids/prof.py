@@ -0,0 +1,70 @@
+# prof.py -- per-phase frame profiler for staroids
+# Time spent in each phase of a frame (input, physics, etc) is added up with
+# mark() and stored by end_frame() in a ring buffer allocated up front, along
+# with gc.mem_free(). Nothing is printed until summary() is asked for, since
+# printing to serial is slow enough to show up in the frame times itself.
+import time, gc, array
+
+mem_free = getattr(gc, 'mem_free', lambda: 0)  # no mem_free() off-device
+try:
+    ticks_ns = time.perf_counter_ns  # finer timer, when running on a desktop
+except AttributeError:
+    ticks_ns = time.monotonic_ns
+
+class Profiler:
+    def __init__(self, phases, size=120):
+        self.phases = phases  # names of phases, mark() takes an index into this
+        self.size = size      # how many frames to keep
+        n = len(phases)
+        self.ring = array.array('l', [0] * (n * size))  # us, per phase per frame
+        self.mem = array.array('l', [0] * size)
+        self.cur = array.array('l', [0] * n)
+        self.frames = 0       # frames recorded ever
+        self.counts = {}      # event name -> times it happened
+        self.t = ticks_ns()
+
+    def start(self):
+        """start timing the first phase of a frame"""
+        self.t = ticks_ns()
+
+    def mark(self, phase):
+        """time since the last mark (or start) was spent in 'phase'"""
+        now = ticks_ns()
+        self.cur[phase] += (now - self.t) // 1000
+        self.t = now
+
+    def event(self, name):
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def end_frame(self):
+        n, cur = len(self.phases), self.cur
+        k = (self.frames % self.size) * n
+        for p in range(n):
+            self.ring[k + p] = cur[p]
+            cur[p] = 0
+        self.mem[self.frames % self.size] = mem_free()
+        self.frames += 1
+        self.t = ticks_ns()
+
+    def summary(self):
+        """min/avg/p95 per phase over the frames in the ring, as a string"""
+        n = len(self.phases)
+        count = min(self.frames, self.size)
+        if not count:
+            return "prof: no frames yet"
+        lines = ["prof: %d frames, mem_free min %d  %s" % (count, min(self.mem[:count]),
+                  " ".join("%s=%d" % kv for kv in sorted(self.counts.items()))),
+                 "%-8s %7s %7s %7s  (ms)" % ("phase", "min", "avg", "p95")]
+        totals = [0] * count
+        for p in range(n):
+            vals = sorted(self.ring[i*n + p] for i in range(count))
+            for i in range(count):
+                totals[i] += self.ring[i*n + p]
+            lines.append(self._line(self.phases[p], vals))
+        lines.append(self._line("total", sorted(totals)))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _line(name, vals):
+        return "%-8s %7.2f %7.2f %7.2f" % (name, vals[0] / 1000, sum(vals) / len(vals) / 1000,
+                                           vals[len(vals) * 95 // 100] / 1000)
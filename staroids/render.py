@@ -0,0 +1,79 @@
+# render.py -- dirty-rectangle tracking for staroids
+# Remembers where each watched TileGrid was (x, y, tile, hidden) at the last
+# refresh. Each frame it adds up the area of the old & new bounding boxes of
+# the ones that changed. If nothing changed the display.refresh() is skipped
+# entirely (but the frame rate is kept by sleeping instead), and the area
+# numbers say how much of the screen actually had to be sent to the display.
+import time, array
+
+class DirtyTracker:
+    def __init__(self, display, target_fps=30, paced=True):
+        self.display = display
+        self.target_fps = target_fps
+        self.paced = paced  # False if the caller keeps the frame rate itself (asyncio)
+        self.frame_ns = 1_000_000_000 // target_fps
+        self.last_ns = time.monotonic_ns()
+        self.screen_area = display.width * display.height
+        self.tgs = []
+        self.sizes = array.array('H')   # w,h per watched tilegrid
+        self.state = array.array('h')   # x,y,tile,hidden per watched tilegrid
+        self.extra = 0   # area marked dirty by hand since last refresh
+        self.area = 0    # area refreshed last frame
+        self.frames = 0  # frames where we refreshed
+        self.skipped = 0 # frames where nothing changed
+        self.total_area = 0
+
+    def watch(self, tg, w, h):
+        """start tracking TileGrid 'tg' that is 'w' x 'h' pixels"""
+        self.tgs.append(tg)
+        self.sizes.extend((w, h))
+        self.state.extend((tg.x, tg.y, tg[0], tg.hidden))
+        self.extra += w * h  # it's new, so it's dirty
+
+    def mark(self, area):
+        """mark 'area' pixels dirty for things not watched (labels, palettes)"""
+        self.extra += area
+
+    def scan(self):
+        """update the remembered state, returns dirty area since last scan"""
+        st, sz = self.state, self.sizes
+        area, self.extra = self.extra, 0
+        for i in range(len(self.tgs)):
+            tg = self.tgs[i]
+            k = i * 4
+            x, y, tile, hidden = tg.x, tg.y, tg[0], tg.hidden
+            ox, oy, otile, ohidden = st[k], st[k+1], st[k+2], st[k+3]
+            if x == ox and y == oy and tile == otile and hidden == ohidden:
+                continue
+            st[k], st[k+1], st[k+2], st[k+3] = x, y, tile, hidden
+            w, h = sz[i*2], sz[i*2 + 1]
+            if hidden and ohidden:
+                continue
+            if hidden or ohidden or (x == ox and y == oy):
+                area += w * h   # appeared, disappeared or just changed tile
+            else:
+                # union of old and new box, or both boxes if far apart
+                u = (abs(x - ox) + w) * (abs(y - oy) + h)
+                area += min(u, 2 * w * h)
+        return min(area, self.screen_area)
+
+    def refresh(self):
+        """refresh the display if anything changed, returns True if it did"""
+        self.area = area = self.scan()
+        if area:
+            self.frames += 1
+            self.total_area += area
+            if self.paced:
+                self.display.refresh(target_frames_per_second=self.target_fps)
+            else:
+                self.display.refresh()
+            self.last_ns = time.monotonic_ns()
+            return True
+        # nothing to draw, but keep the same pace as if we did
+        self.skipped += 1
+        if not self.paced:
+            return False
+        wait = self.frame_ns - (time.monotonic_ns() - self.last_ns)
+        time.sleep(max(wait, 0) / 1e9)
+        self.last_ns = time.monotonic_ns()
+        return False
@@ -0,0 +1,139 @@
+# snapshot.py -- save, load & checksum the whole staroids game state
+# The game state is the ThingStore & Pool arrays, which asteroid is in which
+# spatial hash bucket (in order, it decides which one a shot hits first) and
+# a few numbers the game packs with its own struct format (score, times, ...).
+# A snapshot is all of that in one file, little-endian:
+#   b'SNAP', u8 version, u8 stores, u8 pools, u8 pad, the game's numbers,
+#   per store:  every array's bytes (x, y, vx, vy, angle, va, time, hidden, rot)
+#   per pool:   u16 free count, u16 live, u16 high, u16 full, u32 spawns,
+#               free stack & life arrays' bytes
+#   u16 bucket entries, then u16 bucket, u8 store, u8 slot for each, in order
+# A Trace is a checksum of the same state every so often, recorded to a file
+# or compared against one recorded earlier (a golden trace).
+import struct, binascii
+
+magic = b'SNAP'
+version = 2
+
+def store_arrays(store):
+    return (store.x, store.y, store.vx, store.vy, store.angle, store.va, store.time,
+            store.hidden, store.rot)
+
+class GameState:
+    def __init__(self, stores, pools, grid, fmt):
+        """'fmt' is the struct format of the game's own numbers"""
+        self.stores, self.pools, self.grid = stores, pools, grid
+        self.fmt = fmt
+        self.arrays = [a for st in stores for a in store_arrays(st)]
+        for pool in pools:
+            self.arrays.extend((pool.free, pool.life))
+        self.head = bytearray(struct.calcsize(fmt))
+        self.counts = bytearray(12 * len(pools))
+
+    def _pack(self, values):
+        struct.pack_into(self.fmt, self.head, 0, *values)
+        for k, p in enumerate(self.pools):
+            struct.pack_into('<HHHHI', self.counts, 12 * k, p.nfree, p.live, p.high, p.full, p.spawns)
+
+    def _buckets(self):
+        # (bucket, store, slot) of every Thing in the spatial hash, in bucket order
+        out = bytearray()
+        for b, bucket in enumerate(self.grid.buckets):
+            for thing in bucket:
+                out.extend(struct.pack('<HBB', b, self.stores.index(thing.store), thing.i))
+        return out
+
+    def checksum(self, values):
+        """CRC-32 of the game state, 'values' are the game's numbers"""
+        self._pack(values)
+        crc = binascii.crc32(self.head)
+        crc = binascii.crc32(self.counts, crc)
+        for a in self.arrays:
+            crc = binascii.crc32(a, crc)
+        return binascii.crc32(self._buckets(), crc)
+
+    def save(self, fname, values):
+        self._pack(values)
+        buckets = self._buckets()
+        with open(fname, 'wb') as f:
+            f.write(magic + bytes((version, len(self.stores), len(self.pools), 0)))
+            f.write(self.head)
+            f.write(self.counts)
+            for a in self.arrays:
+                f.write(a)
+            f.write(struct.pack('<H', len(buckets) // 4))
+            f.write(buckets)
+
+    def load(self, fname):
+        """load a snapshot saved by the same game setup, returns the game's numbers"""
+        with open(fname, 'rb') as f:
+            hdr = f.read(8)
+            if hdr[:4] != magic or hdr[4] != version or hdr[5] != len(self.stores) \
+               or hdr[6] != len(self.pools):
+                raise ValueError("not a snapshot of this game: " + fname)
+            f.readinto(self.head)
+            f.readinto(self.counts)
+            for a in self.arrays:
+                f.readinto(a)
+            n = struct.unpack('<H', f.read(2))[0]
+            buckets = f.read(4 * n)
+        for k, p in enumerate(self.pools):
+            p.nfree, p.live, p.high, p.full, p.spawns = struct.unpack_from('<HHHHI', self.counts, 12 * k)
+        for store in self.stores:
+            store.sync()
+        grid = self.grid
+        for bucket in grid.buckets:
+            for thing in bucket:
+                thing.cell = -1
+            del bucket[:]
+        for k in range(0, len(buckets), 4):
+            b, st, i = struct.unpack_from('<HBB', buckets, k)
+            thing = self.stores[st].things[i]
+            grid.buckets[b].append(thing)
+            thing.cell = b
+        return struct.unpack(self.fmt, self.head)
+
+
+class Trace:
+    """(tick, checksum) pairs, 8 bytes each: written to 'fname', or if it's
+    already there, compared with what's in it"""
+    def __init__(self, fname):
+        try:
+            self.f = open(fname, 'rb')
+            self.comparing = True
+        except OSError:
+            self.f = open(fname, 'wb')
+            self.comparing = False
+        self.buf = bytearray(8)
+        self.checked, self.differ, self.first = 0, 0, -1
+
+    def check(self, tick, crc):
+        if not self.comparing:
+            struct.pack_into('<II', self.buf, 0, tick, crc)
+            self.f.write(self.buf)
+            self.checked += 1
+            return True
+        while True:  # skip to 'tick', a run from a snapshot starts part way in
+            if self.f.readinto(self.buf) != 8:
+                return True  # past the end of the golden trace
+            t, c = struct.unpack('<II', self.buf)
+            if t >= tick:
+                break
+        self.checked += 1
+        if (t, c) != (tick, crc):
+            self.differ += 1
+            if self.first < 0:
+                self.first = tick
+                print("trace differs at tick", tick)
+            return False
+        return True
+
+    def report(self):
+        if not self.comparing:
+            return "%d checksums recorded" % self.checked
+        if self.differ:
+            return "%d checksums, %d differ (first at tick %d)" % (self.checked, self.differ, self.first)
+        return "%d checksums, all the same" % self.checked
+
+    def close(self):
+        self.f.close()
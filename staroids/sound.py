@@ -0,0 +1,111 @@
+# sound.py -- sound effects for staroids through an audiomixer.Mixer
+# Each effect's WAV is read into RAM once at startup (mixed down to mono) and
+# played as a RawSample, so playing never touches flash. The Mixer has a few
+# voices, so a pew doesn't cut off an explosion. When they're all busy, a new
+# effect takes over the voice playing the least important (then oldest) one,
+# unless that's more important than it. Each effect also has a minimum gap
+# between plays, so holding down fire doesn't keep restarting voices.
+import time, array, struct
+import audiocore, audiomixer
+
+class Zeros:
+    """'n' zeros with a length, so array.array() allocates itself once and
+    there's no second buffer-sized bytes() around while it does"""
+    def __init__(self, n):
+        self.n = n
+    def __len__(self):
+        return self.n
+    def __iter__(self):
+        for _ in range(self.n):
+            yield 0
+
+def read_wav(fname):
+    """returns (mono 16-bit samples in an array, sample rate) of a 16-bit PCM WAV"""
+    with open(fname, 'rb') as f:
+        riff = f.read(12)
+        if riff[:4] != b'RIFF' or riff[8:] != b'WAVE':
+            raise ValueError("not a WAV: " + fname)
+        channels = rate = 0
+        while True:
+            hdr = f.read(8)
+            if len(hdr) < 8:
+                raise ValueError("no data in WAV: " + fname)
+            kind, size = hdr[:4], struct.unpack('<I', hdr[4:])[0]
+            if kind == b'fmt ':
+                fmt = f.read(size)
+                tag, channels, rate = struct.unpack('<HHI', fmt[:8])
+                bits = struct.unpack('<H', fmt[14:16])[0]
+                if tag != 1 or bits != 16:
+                    raise ValueError("only 16-bit PCM WAVs: " + fname)
+            elif kind == b'data':
+                break
+            else:
+                f.read(size + (size & 1))
+        n = size // (2 * channels)  # frames
+        samples = array.array('h', Zeros(n))
+        chunk = array.array('h', bytes(256 * channels))  # read a bit at a time to mix down
+        i = 0
+        while i < n:
+            got = min(f.readinto(chunk) // (2 * channels), n - i)  # not into the next chunk
+            if not got:
+                break
+            for j in range(got):
+                total = 0
+                for c in range(channels):
+                    total += chunk[j * channels + c]
+                samples[i + j] = total // channels
+            i += got
+    return samples, rate
+
+
+class Sounds:
+    def __init__(self, audio, voices=2, sample_rate=11025, size=4):
+        self.mixer = audiomixer.Mixer(voice_count=voices, sample_rate=sample_rate, channel_count=1,
+                                      bits_per_sample=16, samples_signed=True)
+        self.sample_rate = sample_rate
+        self.samples = [None] * size            # effect number -> RawSample
+        self.priority = bytearray(size)         # higher wins a voice
+        self.gap = array.array('f', [0] * size) # seconds between plays of an effect, at least
+        self.last = array.array('f', [-1000] * size)  # when each effect was last played
+        self.voice_fx = array.array('b', [-1] * voices)  # effect playing on each voice
+        self.voice_t = array.array('f', [0] * voices)    # and when it started
+        self.plays, self.steals, self.dropped, self.limited = 0, 0, 0, 0
+        audio.play(self.mixer)
+
+    def load(self, fx, fname, priority=0, min_gap=0):
+        """read WAV 'fname' into RAM as effect number 'fx'"""
+        samples, rate = read_wav(fname)
+        if rate != self.sample_rate:
+            raise ValueError("%s is %d Hz, mixer is %d Hz" % (fname, rate, self.sample_rate))
+        self.samples[fx] = audiocore.RawSample(samples, channel_count=1, sample_rate=rate)
+        self.priority[fx] = priority
+        self.gap[fx] = min_gap
+
+    def play(self, fx):
+        now = time.monotonic()
+        if now - self.last[fx] < self.gap[fx]:
+            self.limited += 1
+            return
+        voices = self.mixer.voice
+        v = -1
+        for i in range(len(voices)):
+            if not voices[i].playing:
+                v = i
+                break
+        if v < 0:  # all busy, take the least important, oldest one
+            pri, vfx, vt = self.priority, self.voice_fx, self.voice_t
+            for i in range(len(voices)):
+                if v < 0 or pri[vfx[i]] < pri[vfx[v]] or (pri[vfx[i]] == pri[vfx[v]] and vt[i] < vt[v]):
+                    v = i
+            if pri[vfx[v]] > pri[fx]:
+                self.dropped += 1
+                return
+            self.steals += 1
+        self.last[fx] = now
+        self.voice_fx[v], self.voice_t[v] = fx, now
+        voices[v].play(self.samples[fx])
+        self.plays += 1
+
+    def report(self):
+        return "%d plays, %d steals, %d dropped, %d rate limited" % (
+            self.plays, self.steals, self.dropped, self.limited)
@@ -0,0 +1,225 @@
+# sprites.py -- load sprite sheets from a sprite bank file
+# A bank holds all the sprite sheets for one tile size, already packed the way
+# bitmaptools.readinto() wants them, so loading is: read a small directory,
+# make an empty Bitmap, readinto() it. No BMP parsing and no temp objects.
+# Banks are made from the BMP sheets by tools/make_spritebank.py
+#
+# Boards short on RAM can load every Nth rotation only (load(name, step)), or
+# keep just the rotations in use in a small TileCache, filled from the bank
+# (load_tile) or made with bitmaptools.rotozoom. plan() picks what fits.
+#
+# Rotation sheets also carry the pixel hit spans of their tiles (see
+# staroids/collide.py), worked out when the bank is made, so the board doesn't
+# scan every tile at boot (or, with lazy rotations, read them all from flash).
+#
+# File layout, little-endian:
+#   header:    b'SPRB', u8 version, u8 tile size, u8 sheet count, u8 pad
+#   per sheet: 8-byte name, u16 width, u16 height, u8 bits per pixel,
+#              u8 color count, u8 transparent index (255 = none), u8 pad,
+#              u32 data offset, u32 spans offset (0 = none),
+#              colors * u32 0xRRGGBB
+#   data:      rows top to bottom, each padded to a whole byte, MSB pixel first
+#   spans:     per tile of the first row of tiles, per pixel row, u8 leftmost
+#              & u8 rightmost lit pixel (255, 0 if none lit)
+import struct, math, array
+import displayio, bitmaptools
+
+magic = b'SPRB'
+version = 2
+rotation_sheets = ('ship', 'roid0', 'roid1')  # sheets that are one tile per rotation
+
+try:
+    blit = bitmaptools.blit
+except AttributeError:  # CircuitPython 8 and older
+    def blit(dest, src, x, y, x1, y1, x2, y2):
+        dest.blit(x, y, src, x1=x1, y1=y1, x2=x2, y2=y2)
+
+def bitmap_bytes(w, h, colors):
+    # RAM a displayio.Bitmap takes: 1,2,4 or 8 bits per pixel, rows padded to 32 bits
+    bits = 1 if colors <= 2 else 2 if colors <= 4 else 4 if colors <= 16 else 8
+    return ((w * bits + 31) // 32) * 4 * h
+
+class SpriteBank:
+    def __init__(self, fname):
+        self.f = open(fname, 'rb')
+        hdr = self.f.read(8)
+        if hdr[:4] != magic or hdr[4] != version:
+            raise ValueError("not a v%d sprite bank: %s" % (version, fname))
+        self.tile_w = hdr[5]
+        self.sheets = {}  # name -> (width, height, bpp, palette, data offset, spans offset)
+        for _ in range(hdr[6]):
+            name, w, h, bpp, ncolors, transparent, _, offset, spans = struct.unpack(
+                '<8sHHBBBBII', self.f.read(24))
+            colors = struct.unpack('<%dI' % ncolors, self.f.read(4 * ncolors))
+            pal = displayio.Palette(ncolors)
+            for i in range(ncolors):
+                pal[i] = colors[i]
+            if transparent != 255:
+                pal.make_transparent(transparent)
+            self.sheets[name.rstrip(b'\0').decode()] = (w, h, bpp, pal, offset, spans)
+
+        self.rowbmp = None  # for load_tile()
+
+    def load(self, name, step=1):
+        """returns (bitmap, palette) of sheet 'name', like adafruit_imageload.load()
+        With step > 1 only every step'th tile of each row is kept"""
+        w, h, bpp, pal, offset, _ = self.sheets[name]
+        self.f.seek(offset)
+        if step == 1:
+            bitmap = displayio.Bitmap(w, h, len(pal))
+            bitmaptools.readinto(bitmap, self.f, bits_per_pixel=bpp, element_size=1)
+            return bitmap, pal
+        tw = self.tile_w
+        cols = w // tw // step
+        bitmap = displayio.Bitmap(cols * tw, h, len(pal))
+        row = displayio.Bitmap(w, 1, len(pal))  # rows are whole bytes, so read one at a time
+        for y in range(h):
+            bitmaptools.readinto(row, self.f, bits_per_pixel=bpp, element_size=1)
+            for c in range(cols):
+                blit(bitmap, row, c * tw, y, x1=c * step * tw, y1=0, x2=(c * step + 1) * tw, y2=1)
+        return bitmap, pal
+
+    def load_tile(self, name, tile, dest, dx):
+        """read just tile number 'tile' of sheet 'name' into Bitmap 'dest' at x=dx"""
+        w, h, bpp, pal, offset, _ = self.sheets[name]
+        tw = self.tile_w
+        cols = w // tw
+        ty, tx = divmod(tile, cols)
+        stride = (w * bpp + 7) // 8
+        bit = tx * tw * bpp
+        if self.rowbmp is None:  # a tile row, plus a byte for tiles not starting on a byte
+            self.rowbmp = displayio.Bitmap(((tw * bpp + 7) // 8 + 1) * 8 // bpp, 1, len(pal))
+        row = self.rowbmp
+        # (the extra byte can read into the next sheet, which is fine: shot is last)
+        for y in range(tw):
+            self.f.seek(offset + (ty * tw + y) * stride + bit // 8)
+            bitmaptools.readinto(row, self.f, bits_per_pixel=bpp, element_size=1)
+            sx = (bit % 8) // bpp
+            blit(dest, row, dx, y, x1=sx, y1=0, x2=sx + tw, y2=1)
+
+    def load_spans(self, name, step=1):
+        """the pixel hit spans of every step'th tile of rotation sheet 'name', like
+        collide.sheet_spans() of what load(name, step) gives, or None if it has none"""
+        w, h, bpp, pal, offset, spans_offset = self.sheets[name]
+        if not spans_offset:
+            return None
+        size = self.tile_w * 2  # bytes per tile
+        n = w // self.tile_w // step
+        spans = bytearray(n * size)
+        if step == 1:
+            self.f.seek(spans_offset)
+            self.f.readinto(spans)
+            return spans
+        view = memoryview(spans)
+        for t in range(n):
+            self.f.seek(spans_offset + t * step * size)
+            self.f.readinto(view[t * size:(t + 1) * size])
+        return spans
+
+    def cost(self, step=1, cache_slots=0, split_sizes=(), spans=False):
+        """bytes of RAM all sheets take loaded with load(name, step). If
+        cache_slots, roid sheets are a TileCache that many tiles wide instead.
+        split_sizes are smaller tile sizes whose roid sheets are loaded too.
+        With 'spans', add the pixel hit spans of the rotation sheets (2 bytes a row)"""
+        total = 0
+        for name, (w, h, bpp, pal, offset, _) in self.sheets.items():
+            if name in rotation_sheets:
+                n = w // self.tile_w // step  # tiles per row
+                w = n * self.tile_w
+                if spans:
+                    total += n * self.tile_w * 2
+                if name.startswith('roid'):
+                    for size in split_sizes:  # other banks have the same sheets, smaller
+                        total += bitmap_bytes(n * size, size, len(pal))
+                        if spans:
+                            total += n * size * 2
+                    if cache_slots:
+                        w, h = cache_slots * self.tile_w, self.tile_w
+            total += bitmap_bytes(w, h, len(pal))
+        return total
+
+    def close(self):
+        self.f.close()
+
+
+def plan(fname, sizes, budget, cache_slots=0, steps=(1, 2, 3, 4), split=False, spans=False):
+    """open the sprite bank with the biggest tile size in 'sizes' whose sheets
+    fit in 'budget' bytes, with the most rotations that fit. fname is like
+    '/imgs/sprites_%d.bin'. Returns (bank, step), or (None, 1) if no bank files.
+    If nothing fits, it's the smallest tiles with the fewest rotations.
+    With 'split', the roid sheets of all the smaller sizes count too, and
+    with 'spans' the pixel hit spans"""
+    bank = None
+    for k, tile_w in enumerate(sizes):
+        try:
+            b = SpriteBank(fname % tile_w)
+        except OSError:
+            continue
+        if bank:
+            bank.close()
+        bank = b
+        for step in steps:
+            if bank.cost(step, cache_slots, sizes[k+1:] if split else (), spans) <= budget:
+                return bank, step
+    return bank, steps[-1] if bank else 1
+
+
+class TileCache:
+    """A few rotation tiles in one small Bitmap, for a TileGrid to show instead
+    of a whole sprite sheet. get() loads a tile into a free slot if it's not
+    there already, throwing out the least-recently-used tile no Thing is
+    showing. fill(tile, bitmap, x) draws rotation 'tile' into bitmap at x"""
+    def __init__(self, num_tiles, tile_w, slots, palette, fill):
+        self.tile_w = tile_w
+        self.bitmap = displayio.Bitmap(tile_w * slots, tile_w, len(palette))
+        self.palette = palette
+        self.fill = fill
+        self.slot_of = array.array('h', [-1] * num_tiles)  # tile -> slot, -1 = not loaded
+        self.tile_in = array.array('h', [-1] * slots)      # slot -> tile
+        self.refs = bytearray(slots)  # how many Things are showing each slot
+        self.used = array.array('l', [0] * slots)  # when each slot was last asked for
+        self.clock = 0
+        self.hits, self.misses = 0, 0
+
+    def get(self, tile):
+        """returns the slot holding 'tile', call release(slot) when done with it"""
+        self.clock += 1
+        s = self.slot_of[tile]
+        if s >= 0:
+            self.hits += 1
+        else:
+            self.misses += 1
+            s = self.evict()
+            self.fill(tile, self.bitmap, s * self.tile_w)
+            self.slot_of[tile], self.tile_in[s] = s, tile
+        self.refs[s] += 1
+        self.used[s] = self.clock
+        return s
+
+    def release(self, slot):
+        self.refs[slot] -= 1
+
+    def evict(self):
+        refs, used = self.refs, self.used
+        best = -1
+        for s in range(len(refs)):
+            if not refs[s] and (best < 0 or used[s] < used[best]):
+                best = s
+        if best < 0:
+            raise RuntimeError("TileCache: more Things than slots")
+        if self.tile_in[best] >= 0:
+            self.slot_of[self.tile_in[best]] = -1
+        return best
+
+
+def rotozoom_fill(base, num_tiles):
+    """a TileCache fill that rotates tile 'base' (a tile_w square Bitmap) instead
+    of reading from flash. Slower to draw but needs no sprite bank"""
+    tw = base.width
+    def fill(tile, bitmap, x):
+        bitmaptools.fill_region(bitmap, x, 0, x + tw, tw, 0)
+        bitmaptools.rotozoom(bitmap, base, ox=x + tw // 2, oy=tw // 2,
+                             dest_clip0=(x, 0), dest_clip1=(x + tw, tw),
+                             px=tw // 2, py=tw // 2,
+                             angle=tile * 2 * math.pi / num_tiles, skip_index=0)
+    return fill
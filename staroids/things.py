@@ -0,0 +1,354 @@
+# things.py -- physics "Things" for staroids, kept as struct-of-arrays
+# Each kind of Thing (roids, shots, ship, explosions) gets one ThingStore that
+# holds x, y, vx, vy, angle, va, time & hidden in parallel arrays, one slot
+# per Thing. ThingStore.update() moves them all in one pass and puts their
+# TileGrids where they are. A Thing is a small view onto one slot, so code
+# can still say 'roid.x = 10' or 'ship.thrust(0.1)'.
+import math, array
+
+two_pi = 2 * math.pi
+
+class ThingStore:
+    """Floating-point physics: x,y in pixels, angles in radians"""
+    typecode = 'f'
+    def __init__(self, size, width, height, w=0, num_tiles=1, vmax=3, hitbox=0):
+        self.size, self.count = size, 0
+        self.width, self.height = width, height  # screen size, things wrap around it
+        self.w, self.half_w = w, w // 2  # sprite width, we think in zero-centered things
+        self.num_tiles = num_tiles
+        self.vmax = vmax    # max velocity. 3 on pybadge, 4 on FunHouse
+        self.hitbox = hitbox
+        self.sweep = int(vmax) + 2  # most pixels a Thing moves in a tick, relative to another
+        self.wrap_dx, self.wrap_dy = width // 2, height // 2
+        self.tile_k = num_tiles / two_pi  # radians -> tile number
+        zeros = [0] * size
+        self.x, self.y = array.array(self.typecode, zeros), array.array(self.typecode, zeros)
+        self.vx, self.vy = array.array(self.typecode, zeros), array.array(self.typecode, zeros)
+        self.angle, self.va = array.array(self.typecode, zeros), array.array(self.typecode, zeros)
+        self.time = array.array('f', zeros)  # when it was born, time.monotonic()
+        self.hidden = bytearray(size)
+        self.rot = array.array('h', [-1] * size)  # rotation tile showing, with alt sprite offset
+        self.tgs = [None] * size
+        self.things = []
+        self.caches = None  # per-Thing TileCache, if rotations are lazy-loaded
+        self.slots = None   # which cache slot each Thing is showing
+        self.spans = None   # per-Thing row spans of its sheet, for pixel hits (collide.py)
+
+    def add(self, x, y, vx=0, vy=0, angle=0, va=0, tilegrid=None):
+        """claim the next free slot, returns a Thing for it"""
+        if self.count == self.size:
+            raise IndexError("ThingStore full")
+        i = self.count
+        self.count += 1
+        self.tgs[i] = tilegrid
+        thing = Thing(self, i)
+        thing.x, thing.y, thing.vx, thing.vy = x, y, vx, vy
+        thing.angle, thing.va = angle, va
+        self.rot[i] = self.tile_of(self.angle[i])
+        if tilegrid:
+            tilegrid[0] = self.rot[i]
+        self.things.append(thing)
+        return thing
+
+    def use_cache(self, i, cache):
+        """Thing i's TileGrid shows slots of TileCache 'cache' instead of a full sheet"""
+        if self.caches is None:
+            self.caches = [None] * self.size
+            self.slots = array.array('h', [-1] * self.size)
+        self.caches[i] = cache
+        self.tgs[i][0] = self.swap_tile(i, self.rot[i])
+
+    def use_spans(self, i, spans):
+        """hit Thing i on the lit pixels of its sheet, from collide.sheet_spans()"""
+        if self.spans is None:
+            self.spans = [None] * self.size
+        self.spans[i] = spans
+
+    def swap_tile(self, i, tile):
+        # let go of the old rotation's cache slot, get (maybe load) the new one
+        cache = self.caches[i]
+        if self.slots[i] >= 0:
+            cache.release(self.slots[i])
+        self.slots[i] = slot = cache.get(tile)
+        return slot
+
+    def tile_of(self, a):
+        return round(a * self.tile_k) % self.num_tiles
+
+    # unit conversions between "outside" numbers and what's in the arrays
+    def to_pos(self, v): return v
+    def from_pos(self, v): return v
+    def pixel(self, v): return int(v)  # array position -> whole pixel, like the TileGrid's
+    def to_angle(self, v): return v
+    def from_angle(self, v): return v
+
+    def update(self, alt_sprite_index=0, start=0, end=None):
+        """move Things one step, wrapping around the screen edges, and set
+        their TileGrid position and rotation tile"""
+        xs, ys, vxs, vys, angs, vas, tgs = (self.x, self.y, self.vx, self.vy,
+                                            self.angle, self.va, self.tgs)
+        width, height, half = self.width, self.height, self.half_w
+        n, k = self.num_tiles, self.tile_k
+        rots, cached = self.rot, self.caches is not None
+        alt = alt_sprite_index * n
+        for i in range(start, self.count if end is None else end):
+            x = (xs[i] + vxs[i]) % width   # wrap around top-bottom
+            y = (ys[i] + vys[i]) % height  # and left-right
+            a = (angs[i] + vas[i]) % two_pi  # if thing is spinning
+            xs[i], ys[i], angs[i] = x, y, a
+            tg = tgs[i]
+            tg.x = int(x) - half  # tilegrids are top-left zero'd
+            tg.y = int(y) - half
+            t = round(a * k) % n + alt  # tile index from angle
+            if t != rots[i]:
+                rots[i] = t
+                tg[0] = self.swap_tile(i, t) if cached else t
+
+    def sync(self):
+        """put every TileGrid where its Thing is, after the arrays were changed
+        behind update()'s back (like loading a snapshot)"""
+        half = self.half_w
+        for i in range(self.count):
+            tg = self.tgs[i]
+            tg.x = int(self.from_pos(self.x[i])) - half
+            tg.y = int(self.from_pos(self.y[i])) - half
+            tg.hidden = bool(self.hidden[i])
+            if self.caches is not None:
+                tg[0] = self.swap_tile(i, self.rot[i])
+            else:
+                tg[0] = self.rot[i]
+
+    def age_out(self, now, life):
+        """hide Things older than 'life' seconds"""
+        times, hidden = self.time, self.hidden
+        for i in range(self.count):
+            if not hidden[i] and now - times[i] > life:
+                self.hide(i)
+
+    def hide(self, i, hide=True):
+        self.hidden[i] = hide
+        self.tgs[i].hidden = hide
+
+    def accelerate(self, i, angle, amount):
+        vmax = self.vmax
+        self.vx[i] = max(min(self.vx[i] + (math.sin(angle) * amount), vmax), -vmax)
+        self.vy[i] = max(min(self.vy[i] - (math.cos(angle) * amount), vmax), -vmax)
+
+    def turn(self, i, da):
+        self.angle[i] += da
+
+    def thrust(self, i, amount):
+        self.accelerate(i, self.angle[i], amount)
+
+    def launch(self, i, src, j, amount):
+        # put us at src Thing j, heading where it is visibly pointing
+        self.x[i], self.y[i] = src.x[j], src.y[j]
+        self.vx[i], self.vy[i] = 0, 0
+        self.accelerate(i, src.rot[j] * (two_pi / src.num_tiles), amount)
+
+    def set_pos(self, i, src, j):
+        self.x[i], self.y[i] = src.x[j], src.y[j]
+        self.vx[i], self.vy[i], self.va[i] = src.vx[j], src.vy[j], src.va[j]
+
+    def is_hit(self, i, obj, j):
+        # try doing all as int math for speed. dx,dy wrap around the screen
+        # so things on opposite edges can still touch
+        hb = self.hitbox
+        dx = (int(self.x[i]) - int(obj.x[j]) + self.wrap_dx) % self.width - self.wrap_dx
+        dy = (int(self.y[i]) - int(obj.y[j]) + self.wrap_dy) % self.height - self.wrap_dy
+        if self.spans:
+            return self.touches(i, obj, j, dx, dy)
+        return -hb < dx < hb and -hb < dy < hb
+
+    def touches(self, i, obj, j, dx, dy):
+        # pixel hit test, Thing i is dx,dy pixels from obj's Thing j. A bounding
+        # box first, then the lit pixel spans of both tiles, row by row. Things
+        # with no spans are points (shots) and are checked along the path they
+        # moved last tick, so fast ones can't skip over us
+        w, half = self.w, self.half_w
+        spans = self.spans[i]
+        k = (self.rot[i] % self.num_tiles) * w * 2
+        ospans = obj.spans[j] if obj.spans else None
+        if ospans is None:
+            reach = half + obj.sweep
+            if not (-reach < dx < reach and -reach < dy < reach):
+                return False
+            vx = self.from_pos(obj.vx[j] - self.vx[i])  # its move, seen from us
+            vy = self.from_pos(obj.vy[j] - self.vy[i])
+            n = int(max(abs(vx), abs(vy))) + 1  # steps of a pixel or less
+            px, py = half - dx, half - dy  # where it is in our tile
+            for s in range(n + 1):
+                x, y = int(px - vx * s / n), int(py - vy * s / n)
+                if 0 <= y < w and spans[k + 2*y] <= x <= spans[k + 2*y + 1]:
+                    return True
+            return False
+        ohalf = obj.half_w
+        reach = half + ohalf
+        if not (-reach < dx < reach and -reach < dy < reach):
+            return False
+        ok = (obj.rot[j] % obj.num_tiles) * obj.w * 2
+        ox, oy = dx - half + ohalf, dy - half + ohalf  # our tile's corner in theirs
+        for y in range(max(0, -oy), min(w, obj.w - oy)):
+            a, b = k + 2*y, ok + 2*(y + oy)
+            if spans[a] + ox <= ospans[b + 1] and ospans[b] <= spans[a + 1] + ox:
+                return True  # (empty rows are lo > hi so never overlap)
+        return False
+
+
+# Fixed-point physics, for chips with no floating-point hardware (RP2040, ESP32-S2)
+# x,y & vx,vy are ints scaled by 2**fp_bits. The angle is the sprite tile index
+# scaled by 2**8, so no degrees->tile conversion is needed. sin/cos come from
+# tables made once per num_tiles, 2**fine_bits steps per tile, so thrust goes
+# where the ship really points (like the float physics), not just where its
+# tile shows. Floats are only used at setup & for the Thing.x, .angle, etc.
+# properties.
+fp_bits = 16  # 320 << 16 is still a small int on 32-bit CircuitPython (under 2**30)
+fp_one = 1 << fp_bits
+fine_bits = 4     # sin/cos table steps per tile, as a power of 2
+trig_bits = 14    # sin/cos are scaled by 2**trig_bits (fits array 'h')
+amount_bits = 12  # thrust amounts are scaled by 2**amount_bits
+push_shift = trig_bits + amount_bits - fp_bits  # sin * amount -> fixed-point velocity
+trig_tables = {}  # num_tiles -> (sin table, cos table), scaled by 2**trig_bits
+
+def trig_table(num_tiles):
+    if num_tiles not in trig_tables:
+        n = num_tiles << fine_bits
+        a = two_pi / n
+        trig_tables[num_tiles] = (
+            array.array('h', [round(math.sin(i*a) * (1 << trig_bits)) for i in range(n)]),
+            array.array('h', [round(math.cos(i*a) * (1 << trig_bits)) for i in range(n)]))
+    return trig_tables[num_tiles]
+
+class ThingStoreFixed(ThingStore):
+    """Fixed-point physics: same interface as ThingStore, ints in the arrays"""
+    typecode = 'i'
+    def __init__(self, size, width, height, w=0, num_tiles=1, vmax=3, hitbox=0):
+        super().__init__(size, width, height, w, num_tiles, vmax, hitbox)
+        self.wrap_w, self.wrap_h = width << fp_bits, height << fp_bits
+        self.wrap_a = num_tiles << 8  # angle wraps around at num_tiles
+        self.sin = self.cos = None  # made by trig() if this kind of Thing ever thrusts
+        self.wrap_fine = num_tiles << fine_bits
+        self.vmax = round(vmax * fp_one)
+
+    def tile_of(self, a):
+        return ((a + 128) >> 8) % self.num_tiles
+
+    def to_pos(self, v): return round(v * fp_one)
+    def from_pos(self, v): return v / fp_one
+    def pixel(self, v): return v >> fp_bits
+    def to_angle(self, v): return round(v * self.wrap_a / two_pi)
+    def from_angle(self, v): return v * two_pi / self.wrap_a
+
+    def update(self, alt_sprite_index=0, start=0, end=None):
+        xs, ys, vxs, vys, angs, vas, tgs = (self.x, self.y, self.vx, self.vy,
+                                            self.angle, self.va, self.tgs)
+        ww, wh, wa, half, n = self.wrap_w, self.wrap_h, self.wrap_a, self.half_w, self.num_tiles
+        rots, cached = self.rot, self.caches is not None
+        alt = alt_sprite_index * n
+        for i in range(start, self.count if end is None else end):
+            x = (xs[i] + vxs[i]) % ww
+            y = (ys[i] + vys[i]) % wh
+            a = (angs[i] + vas[i]) % wa
+            xs[i], ys[i], angs[i] = x, y, a
+            tg = tgs[i]
+            tg.x = (x >> fp_bits) - half
+            tg.y = (y >> fp_bits) - half
+            t = ((a + 128) >> 8) % n + alt
+            if t != rots[i]:
+                rots[i] = t
+                tg[0] = self.swap_tile(i, t) if cached else t
+
+    def trig(self):
+        if self.sin is None:
+            self.sin, self.cos = trig_table(self.num_tiles)
+        return self.sin, self.cos
+
+    def push(self, i, k, sin, cos, amount):
+        # k is a fine sin/cos table index, amount is scaled by 2**amount_bits
+        vmax, r = self.vmax, 1 << (push_shift - 1)
+        self.vx[i] = max(min(self.vx[i] + ((sin[k] * amount + r) >> push_shift), vmax), -vmax)
+        self.vy[i] = max(min(self.vy[i] - ((cos[k] * amount + r) >> push_shift), vmax), -vmax)
+
+    def accelerate(self, i, angle, amount):
+        k = round(angle * self.tile_k * (1 << fine_bits)) % self.wrap_fine
+        self.push(i, k, *self.trig(), round(amount * (1 << amount_bits)))
+
+    def turn(self, i, da):
+        self.angle[i] = (self.angle[i] + round(da * self.wrap_a / two_pi)) % self.wrap_a
+
+    def thrust(self, i, amount):
+        k = ((self.angle[i] + (1 << (7 - fine_bits))) >> (8 - fine_bits)) % self.wrap_fine
+        self.push(i, k, *self.trig(), round(amount * (1 << amount_bits)))
+
+    def launch(self, i, src, j, amount):
+        # like the float physics, shots go where the ship's tile shows
+        self.x[i], self.y[i] = src.x[j], src.y[j]
+        self.vx[i], self.vy[i] = 0, 0
+        k = (src.rot[j] % src.num_tiles) << fine_bits
+        self.push(i, k, *src.trig(), round(amount * (1 << amount_bits)))
+
+    def is_hit(self, i, obj, j):
+        hb = self.hitbox
+        dx = ((self.x[i] >> fp_bits) - (obj.x[j] >> fp_bits) + self.wrap_dx) % self.width - self.wrap_dx
+        dy = ((self.y[i] >> fp_bits) - (obj.y[j] >> fp_bits) + self.wrap_dy) % self.height - self.wrap_dy
+        if self.spans:
+            return self.touches(i, obj, j, dx, dy)
+        return -hb < dx < hb and -hb < dy < hb
+
+
+class Thing:
+    """One Thing in a ThingStore, get one with ThingStore.add()"""
+    __slots__ = ('store', 'i', 'tg', 'w', 'half_w', 'num_tiles', 'cell')
+    def __init__(self, store, i):
+        self.store, self.i = store, i
+        self.tg = store.tgs[i]
+        self.w, self.half_w, self.num_tiles = store.w, store.half_w, store.num_tiles
+        self.cell = -1  # which SpatialHash bucket we're in, -1 = none
+
+    def _get_x(self): return self.store.from_pos(self.store.x[self.i])
+    def _set_x(self, v): self.store.x[self.i] = self.store.to_pos(v)
+    def _get_y(self): return self.store.from_pos(self.store.y[self.i])
+    def _set_y(self, v): self.store.y[self.i] = self.store.to_pos(v)
+    def _get_vx(self): return self.store.from_pos(self.store.vx[self.i])
+    def _set_vx(self, v): self.store.vx[self.i] = self.store.to_pos(v)
+    def _get_vy(self): return self.store.from_pos(self.store.vy[self.i])
+    def _set_vy(self, v): self.store.vy[self.i] = self.store.to_pos(v)
+    def _get_angle(self): return self.store.from_angle(self.store.angle[self.i])
+    def _set_angle(self, v): self.store.angle[self.i] = self.store.to_angle(v)
+    def _get_va(self): return self.store.from_angle(self.store.va[self.i])
+    def _set_va(self, v): self.store.va[self.i] = self.store.to_angle(v)
+    def _get_time(self): return self.store.time[self.i]
+    def _set_time(self, v): self.store.time[self.i] = v
+    x = property(_get_x, _set_x)
+    y = property(_get_y, _set_y)
+    vx = property(_get_vx, _set_vx)
+    vy = property(_get_vy, _set_vy)
+    angle = property(_get_angle, _set_angle)  # rotation
+    va = property(_get_va, _set_va)  # angular velocity
+    time = property(_get_time, _set_time)
+
+    def accelerate(self, angle, amount):
+        self.store.accelerate(self.i, angle, amount)
+    def turn(self, da):
+        self.store.turn(self.i, da)
+    def thrust(self, amount):
+        self.store.thrust(self.i, amount)
+    def launch(self, obj, amount):
+        self.store.launch(self.i, obj.store, obj.i, amount)
+    def update_pos(self, alt_sprite_index=0):
+        self.store.update(alt_sprite_index, self.i, self.i + 1)
+    def set_pos(self, obj):
+        self.store.set_pos(self.i, obj.store, obj.i)
+    def is_hit(self, obj):
+        return self.store.is_hit(self.i, obj.store, obj.i)
+    def hide(self, hide=True):
+        self.store.hide(self.i, hide)
+    @property
+    def hidden(self):
+        return self.store.hidden[self.i]
+    # ship angle is perceptually wrong for shots at times where displayed sprite tile
+    # doesn't match internal Thing angle. So this computes a new angle based off the
+    # coarse tile grid rotation. Seems to fix the weird "off-axis" shots I was seeing
+    @property
+    def angle_quantized(self):
+        return self.store.rot[self.i] * (two_pi / self.num_tiles)
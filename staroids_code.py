@@ -1,15 +1,52 @@
 # staroids_code.py -- fakey Almost Asteroids
 # 4 Aug 2021 - @todbot
-import board, time, math, random
-import displayio, terminalio, bitmaptools
+import board, time, random
+import displayio
 import adafruit_imageload
-from adafruit_display_text import bitmap_label as label
-import os
-
-enable_sound = False  # set to True to enable experimental sound support (Pygamer)
+import os, gc
+from staroids.collide import SpatialHash, sheet_spans
+from staroids.things import ThingStore, ThingStoreFixed
+from staroids.render import DirtyTracker
+from staroids.loop import FixedStep, Governor
+from staroids.pool import Pool
+from staroids.lights import Lights
+from staroids.hud import HUD
+from staroids import sprites, boards
+from staroids.controls import Controls, THRUST, FIRE, SELECT
+
+enable_sound = False  # set to True to enable experimental sound support (Pybadge, Pygamer, PyPortal)
+sound_voices = 2      # how many sounds can play at once
+fixed_point = False   # set to True to use integer-only physics (faster on RP2040, ESP32-S2)
 
 num_ship_tiles = 36   # how many rotations of the ship sprite
 num_roid_tiles = 120  # how many rotations of the asteroid sprites
+roid_split = True     # shot asteroids split in two smaller ones (30 -> 20 -> 12 px)
+max_roids = None      # most asteroids in play at once when splitting, None = 4 x num_roids
+asset_budget = None   # bytes of RAM sprites can use, None = half of gc.mem_free() at startup
+lazy_rotations = False  # only keep asteroid rotations in use in RAM, load others as needed
+lazy_fill = 'flash'   # where lazy rotations come from: 'flash' (sprite bank) or 'rotozoom'
+pixel_hits = True     # hits are on the sprites' outlines, not just boxes (2 bytes per tile row)
+
+tick_hz = 30          # physics ticks per second, no matter the frame rate
+use_governor = True   # drop effects & asteroids if we can't hold target_fps
+profiling = False     # time each part of the frame, type a key in the serial console for a summary
+profile_every = 0     # also print that summary every this many frames (0 = never)
+show_stats = False    # show frames per second (F), frame time in ms (T) & free memory in kB (K)
+use_asyncio = True    # run input, physics, drawing & effects as asyncio tasks, if
+                      # 'asyncio' & 'adafruit_ticks' from the library bundle are in /lib
+input_hz = 30         # how often buttons are read, with asyncio (boards with slow reads say less)
+fx_hz = 30            # how often LEDs & sounds are updated, with asyncio
+input_record = None   # file name to record button presses to (CIRCUITPY must be writable)
+input_replay = None   # file name of a recording to play back instead of the buttons
+random_seed = None    # seed the random numbers, for games that repeat (with input_replay)
+lockstep = False      # one physics tick per frame, no governor or asyncio: runs repeat exactly
+checksum_every = 0    # checksum the game state every this many ticks (0 = never)
+golden_trace = None   # file to record those checksums to, or to compare them with if it's there
+snapshot_save = None  # (tick, file name) to save the whole game state to at that tick
+snapshot_load = None  # file name of a snapshot to start the game from
+autopilot = None      # 0 to 1: the computer flies the ship, this aggressively (demo, soak tests)
+attract_after = 0     # secs with no buttons pressed before the autopilot takes over, until
+                      # a button is pressed (0 = never)
 
 point_roid = 1        # points for shooting an asteroid
 point_ship = -3       # points for getting hit by an asteroid
@@ -21,344 +58,81 @@ ship_fname = '/imgs/ship_%d_sheet.bmp'
 roidexp_fname = '/imgs/roidexp_%d_sheet.bmp'
 roid_fnames = ['/imgs/roid0_%d_sheet.bmp', '/imgs/roid1_%d_sheet.bmp']
 shot_fname = '/imgs/shotsm3.bmp' # shot fname has smaller 3x3 tile
+# all of the above packed in one file, made by tools/make_spritebank.py
+# (the BMPs are used if it's not there)
+sprite_bank_fname = '/imgs/sprites_%d.bin'
 bg_fname = '/imgs/bg_starfield.bmp' # hubble star field by default (funhouse/pygamer)
 
-# sound wav files, if 'enable_sound=True' (only for Pygamer currently)
+# sound wav files (16-bit, 11 kHz), if 'enable_sound=True'
 pew_wav_fname = "/snds/pew1_11k.wav"
 exp_wav_fname = "/snds/exp1_11k.wav"
 
+# settings above can be changed without editing this file by putting them
+# in a 'staroids_settings.py' on CIRCUITPY, e.g. "fixed_point = True"
+try:
+    from staroids_settings import *
+except ImportError:
+    pass
+
 # default effect handling (sound/light)
 # fx_type = 0 pew, fx_type = 1 explosion
 def play_effect(fx_type,fx_color=0):
-    if fx_type==1: leds.fill(fx_color)
+    if fx_type==1 and quality < 1: lights.flash(fx_color, time.monotonic())
+    if sounds: sounds.play(fx_type)
 
 # --- board params -----------------------------------------------------
 
+# each board is a profile in staroids/boards.py: its params become the settings
+# below, and its buttons, LEDs & speaker are made from it, importing only the
+# modules that board needs
 board_type = os.uname().machine
+board_name, board_profile = boards.find(board_type)
+led_base = None   # resting color of each LED, all off if None
+led_keys = None   # {control bits: LED number} of LEDs lit while those are held
+rainbow = False   # board has a rainbow mode (hold SELECT)
+rainbow_bg = False  # rainbow the background too (full screen redraws)
+rainbowing = False  # rainbow mode held down
+globals().update(board_profile['params'])  # num_roids, tile_w, target_fps, ...
+display = board.DISPLAY
+display.rotation = 0
+leds = boards.make_leds(board_profile['leds'])
+get_user_input = boards.make_input(board_profile['input'])
+audio = None  # audioio.AudioOut, on boards with a speaker
+if enable_sound and board_profile.get('speaker'):
+    audio = boards.make_audio()
+
+# staroids_settings.py can override the board params above too (e.g. "num_roids = 30")
+try:
+    from staroids_settings import *
+except ImportError:
+    pass
 
-# Macropad 128x64 monochrome display, uses 4/5/6 keys for L/T/R
-if 'macropad' in board_type.lower():
-    import keypad
-    import neopixel
-    num_roids = 3
-    num_shots = 3
-    shot_life = 0.4
-    accel_max_shot = 4
-    accel_max_ship = 0.08
-    vmax = 3
-    tile_w = 12
-    bg_fname = '/imgs/bg_stars_mono.bmp'  # special monochrome starfield for macropad
-    display = board.DISPLAY
-    display.rotation = 0
-    leds = neopixel.NeoPixel(board.NEOPIXEL, 12, brightness=0.1)
-    # stolen from adafruit_macropad, thx kattni!
-    keypins = [getattr(board, "KEY%d" % (num + 1)) for num in (list(range(12)))]
-    keys = keypad.Keys(keypins, value_when_pressed=False, pull=True)
-    # Macropad, key processing
-    def get_user_input(turning,thrusting,firing):
-        key = keys.events.get()
-        if key:
-            if key.key_number == 3:  # KEY4 rotate LEFT
-                turning = -0.15 if key.pressed else 0
-            if key.key_number == 5:  # KEY6 rotate RIGHT
-                turning = 0.15 if key.pressed else 0
-            if key.key_number == 4:  # KEY5 THRUST/FIRE!
-                thrusting = key.pressed
-        firing = thrusting  # only using 3 keys
-        return turning, thrusting, firing
-
-# FunHouse 240x240 color display, only 3 buttons so L/T/F (when rotated 90-deg)
-elif 'funhouse' in board_type.lower():
-    import digitalio
-    import adafruit_dotstar
-    num_roids = 4
-    num_shots = 5
-    shot_life = 1
-    accel_max_shot = 5
-    accel_max_ship = 0.2
-    vmax = 5
-    tile_w = 30
-    display = board.DISPLAY
-    display.rotation = 0
-    button_L = digitalio.DigitalInOut(board.BUTTON_UP)     # turn left
-    button_L.switch_to_input(pull=digitalio.Pull.DOWN)
-    button_R = digitalio.DigitalInOut(board.BUTTON_DOWN)   # turn right
-    button_R.switch_to_input(pull=digitalio.Pull.DOWN)
-    button_F = digitalio.DigitalInOut(board.BUTTON_SELECT) # thrust!
-    button_F.switch_to_input(pull=digitalio.Pull.DOWN)
-    leds = adafruit_dotstar.DotStar(board.DOTSTAR_CLOCK,board.DOTSTAR_DATA,5,brightness=0.1)
-    # Funhouse, key processing
-    def get_user_input(turning,thrusting,firing):
-        thrusting = button_F.value
-        turning = 0
-        # check on the user
-        if button_L.value:  # rotate LEFT
-            turning = -0.15
-        if button_R.value:  # rotate RIGHT
-            turning = 0.15
-        if button_F.value:  # THRUST/FIRE!
-            thrusting = True
-        firing = thrusting  # only using 3 keys!
-        return turning, thrusting, firing
-    
-# Pybadge 160x128 color display, D-pad L/R for L/R, A for Thrust/Fire
-elif 'pybadge' in board_type.lower():
-    import keypad
-    import neopixel
-    import rainbowio
-    num_roids = 3
-    num_shots = 3
-    shot_life = 0.5
-    accel_max_shot = 3
-    accel_max_ship = 0.06
-    vmax = 3
-    tile_w = 20
-    display = board.DISPLAY
-    display.rotation = 0
-    keys = keypad.ShiftRegisterKeys(clock=board.BUTTON_CLOCK,data=board.BUTTON_OUT,
-                                    latch=board.BUTTON_LATCH, key_count=8,
-                                    value_when_pressed=True)
-    leds = neopixel.NeoPixel(board.NEOPIXEL, 5, brightness=0.1)
-    rainbowing = False # secret rainbowing mode
-    if enable_sound:
-        import audiocore, audioio, digitalio
-        speaker_enable = digitalio.DigitalInOut(board.SPEAKER_ENABLE)
-        speaker_enable.switch_to_output(value=True)
-        wav_pew = audiocore.WaveFile(open(pew_wav_fname,"rb"))
-        wav_exp = audiocore.WaveFile(open(exp_wav_fname,"rb"))
-        audio = audioio.AudioOut(board.SPEAKER)
-    # Pybadge, key processing
-    def get_user_input(turning,thrusting,firing):
-        global rainbowing
-        key = keys.events.get()
-        if key:
-            if key.key_number == 7:  # KEY4 rotate LEFT
-                turning = -0.12 if key.pressed else 0
-            if key.key_number == 4:  # KEY6 rotate RIGHT
-                turning = 0.12 if key.pressed else 0
-            if key.key_number == 1:  # KEY5 THRUST/FIRE!
-                thrusting = key.pressed
-            if key.key_number == 3:  # SELECT key
-                rainbowing = key.pressed
-        if rainbowing:
-            c = rainbowio.colorwheel( time.monotonic()*100 % 255 )
-            #bg_pal[1] = c # this slows things down a lot due to full screen redraw
-            ship_sprites_pal[1] = c
-            roidexp_sprites_pal[1] = c
-            shot_sprites_pal[1] = c
-            for (s,p) in roid_spr_pal: p[1] = c
-            score_label.color = c
-        firing = thrusting  # only using 3 keys
-        return turning, thrusting, firing
-    # Pybadge, sound/light handling, overrides default
-    def play_effect(fx_type,fx_color=0): # fx_type=0 pew, fx_type = 1 explosion
-        if fx_type==1: leds.fill(fx_color)
-        if enable_sound:
-            if fx_type==0: audio.play(wav_pew)
-            if fx_type==1: audio.play(wav_exp)
-
-# Pygamer 160x128 color display, analog pad L/R for L/R, A for Thrust/Fire
-elif 'pygamer' in board_type.lower():
-    import keypad
-    import neopixel
-    import analogio
-    import rainbowio
-    num_roids = 3
-    num_shots = 3
-    shot_life = 0.5
-    accel_max_shot = 3
-    accel_max_ship = 0.06
-    vmax = 3
-    tile_w = 20
-    display = board.DISPLAY
-    display.rotation = 0
-    keys = keypad.ShiftRegisterKeys(clock=board.BUTTON_CLOCK,data=board.BUTTON_OUT,
-                                    latch=board.BUTTON_LATCH, key_count=8,
-                                    value_when_pressed=True)
-    joystick_x = analogio.AnalogIn(board.JOYSTICK_X)
-    leds = neopixel.NeoPixel(board.NEOPIXEL, 5, brightness=0.1)
-    rainbowing = False # secret rainbowing mode
-    if enable_sound:
-        import audiocore, audioio, digitalio
-        speaker_enable = digitalio.DigitalInOut(board.SPEAKER_ENABLE)
-        speaker_enable.switch_to_output(value=True)
-        wav_pew = audiocore.WaveFile(open(pew_wav_fname,"rb"))
-        wav_exp = audiocore.WaveFile(open(exp_wav_fname,"rb"))
-        audio = audioio.AudioOut(board.SPEAKER)
-    # Pygamer, key processing
-    def get_user_input(turning,thrusting,firing):
-        global rainbowing
-        key = keys.events.get()
-        if key:
-            if key.key_number == 1:  # KEY5 THRUST/FIRE!
-                thrusting = key.pressed
-            if key.key_number == 3:  # SELECT key
-                rainbowing = key.pressed
-        if rainbowing:  # rainbow mode!
-            c = rainbowio.colorwheel( time.monotonic()*100 % 255 )
-            #bg_pal[1] = c # this slows things down a lot due to full screen redraw
-            ship_sprites_pal[1] = c
-            roidexp_sprites_pal[1] = c
-            shot_sprites_pal[1] = c
-            for (s,p) in roid_spr_pal: p[1] = c
-            score_label.color = c
-        firing = thrusting  # only using 3 keys
-        turning = 0
-        if joystick_x.value > 55000: turning = 0.12
-        if joystick_x.value < 1000: turning = -0.12
-        return turning, thrusting, firing
-    # Pygamer, sound/light handling, overrides default
-    def play_effect(fx_type,fx_color=0): # fx_type=0 pew, fx_type = 1 explosion
-        if fx_type==1: leds.fill(fx_color)
-        if enable_sound:
-            if fx_type==0: audio.play(wav_pew)
-            if fx_type==1: audio.play(wav_exp)
-
-# Clue 240x240 color display, A/B for L/R, touch pad 2 (D2) for Thrust/Fire
-elif 'clue' in board_type.lower():
-    import keypad
-    import neopixel
-    import touchio
-    num_roids = 3
-    num_shots = 3
-    shot_life = 0.5
-    accel_max_shot = 3
-    accel_max_ship = 0.06
-    vmax = 3
-    tile_w = 20
-    display = board.DISPLAY
-    display.rotation = 0
-    shooty = touchio.TouchIn(board.D2)
-    keys = keypad.Keys([board.BUTTON_A, board.BUTTON_B], value_when_pressed=False, pull=True)
-    leds = neopixel.NeoPixel(board.NEOPIXEL, 1, brightness=0.1)
-    # Clue, key processing
-    def get_user_input(turning,thrusting,firing):
-        key = keys.events.get()
-        if key:
-            if key.key_number == 0:  # A rotate LEFT
-                turning = -0.15 if key.pressed else 0
-            if key.key_number == 1:  # B rotate RIGHT
-                turning = 0.15 if key.pressed else 0
-        thrusting = shooty.value
-        firing = thrusting  # only using 3 keys!
-        return turning, thrusting, firing
-
-# PyPortal 320x240 display + Joy Featherwing over I2C STEMMA port.
-# X-joystick for L/R, A = fire, B = thrust, SEL for rainbowing
-elif 'pyportal' in board_type.lower():
-    from adafruit_seesaw.seesaw import Seesaw
-    import neopixel
-    import analogio
-    import rainbowio
-    import busio
-    num_roids = 6
-    num_shots = 3
-    shot_life = 2
-    accel_max_shot = 3
-    accel_max_ship = 0.06
-    vmax = 3
-    tile_w = 20
-    bg_fname = '/imgs/bg_starfield_320x240.bmp' # hubble star field big for PyPortal
-    display = board.DISPLAY
-    display.rotation = 0
-    i2c_bus = busio.I2C(board.SCL, board.SDA)
-    ss = Seesaw(i2c_bus)
-
-    BUTTON_A = 6
-    BUTTON_B = 7
-    # BUTTON_Y = 9
-    # BUTTON_X = 10
-    BUTTON_SEL = 14
-    button_mask = ( (1 << BUTTON_A) | (1 << BUTTON_B) | (1 << BUTTON_SEL) )
-
-    ss.pin_mode_bulk(button_mask, ss.INPUT_PULLUP)
-    leds = neopixel.NeoPixel(board.NEOPIXEL, 1, brightness=1)
-    rainbowing = False # secret rainbowing mode
-    if enable_sound:
-        import audiocore, audioio, digitalio
-        speaker_enable = digitalio.DigitalInOut(board.SPEAKER_ENABLE)
-        speaker_enable.switch_to_output(value=True)
-        wav_pew = audiocore.WaveFile(open(pew_wav_fname,"rb"))
-        wav_exp = audiocore.WaveFile(open(exp_wav_fname,"rb"))
-        audio = audioio.AudioOut(board.SPEAKER)
-    # Joy FeatherWing, button processing
-    def get_user_input(turning,thrusting,firing):
-        global rainbowing
-        buttons = ss.digital_read_bulk(button_mask)
-        thrusting = not (buttons & 1<<BUTTON_B)
-        firing = not (buttons & 1<<BUTTON_A)
-        rainbowing = not (buttons & 1<<BUTTON_SEL)
-        if rainbowing:  # rainbow mode!
-            c = rainbowio.colorwheel( time.monotonic()*100 % 255 )
-            bg_pal[1] = c # this slows things down a lot due to full screen redraw
-            ship_sprites_pal[1] = c
-            roidexp_sprites_pal[1] = c
-            shot_sprites_pal[1] = c
-            for (s,p) in roid_spr_pal: p[1] = c
-            score_label.color = c
-        turning = 0
-        joystick_x = ss.analog_read(3)
-        if joystick_x  > 700: turning = 0.12
-        if joystick_x  < 500: turning = -0.12
-        return turning, thrusting, firing
-    def play_effect(fx_type,fx_color=0): # fx_type=0 pew, fx_type = 1 explosion
-        if fx_type==1: leds.fill(fx_color)
-        if enable_sound:
-            if fx_type==0: audio.play(wav_pew)
-            if fx_type==1: audio.play(wav_exp)
+# --- board params end -------------------------------------------------
 
-else:
-    raise OSError("unknown board")
+# repeatable games: same seed, same recorded input, same game, tick for tick
+if random_seed is not None:
+    random.seed(random_seed)
+if lockstep:
+    use_asyncio = use_governor = False  # they both go by the clock
 
-# --- board params end -------------------------------------------------
+# sound effects live in RAM and play through a mixer (see staroids/sound.py)
+sounds = None
+if enable_sound and audio:
+    from staroids.sound import Sounds
+    sounds = Sounds(audio, voices=sound_voices)
+    sounds.load(0, pew_wav_fname, priority=0, min_gap=0.15)  # pews can be cut off
+    sounds.load(1, exp_wav_fname, priority=1, min_gap=0.1)
+
+# LED effects, written out at most once a frame (see staroids/lights.py)
+lights = Lights(leds, base=led_base, keys=led_keys)
 
 
-# helper object for physics things
-class Thing:
-    hitbox = tile_w // 2  # how big our hitbox is, for all Things
-    def __init__(self, x,y, w=0, vx=0,vy=0, angle=0, va=0, tilegrid=None, num_tiles=1):
-        self.x, self.y, self.w = x, y, w  # x,y pos and width
-        self.vx,self.vy = vx,vy # initial x,y velocity
-        self.angle = angle # angle object is rotation
-        self.va = va   # initial angular velocity
-        self.vmax = vmax  # max velocity. 3 on pybadge, 4 on FunHouse 
-        self.tg = tilegrid
-        self.num_tiles = num_tiles
-        self.time = 0
-    def accelerate(self,angle, amount):
-        self.vx = max(min(self.vx + (math.sin(angle) * amount), self.vmax),-self.vmax)
-        self.vy = max(min(self.vy - (math.cos(angle) * amount), self.vmax),-self.vmax)
-    def update_pos(self, alt_sprite_index=0):
-        self.x = (self.x + self.vx) % display.width  # wrap around top-bottom
-        self.y = (self.y + self.vy) % display.height # and left-right
-        self.tg.x = int(self.x) - self.w//2 # we think in zero-centered things
-        self.tg.y = int(self.y) - self.w//2 # but tilegrids are top-left zero'd
-        self.angle += self.va   # if object is spinning
-        # get a tilegrid index based on angle and number of tiles total
-        i = round(math.degrees(self.angle) / (360 / self.num_tiles)) % self.num_tiles
-        self.tg[0] = i + (alt_sprite_index * self.num_tiles)
-    def set_pos(self,obj):
-        self.x, self.y = obj.x, obj.y
-        self.vx, self.vy, self.va = obj.vx, obj.vy, obj.va
-    def is_hit(self, obj):
-        # try doing all as int math for speed
-        if (int(self.x) > int(obj.x) - self.hitbox and
-            int(self.x) < int(obj.x) + self.hitbox and
-            int(self.y) > int(obj.y) - self.hitbox and
-            int(self.y) < int(obj.y) + self.hitbox):
-                return True
-        return False
-    def hide(self,hide=True):
-        self.tg.hidden=hide
-    @property
-    def hidden(self):
-        return self.tg.hidden
-    # ship angle is perceptually wrong for shots at times where displayed sprite tile
-    # doesn't match internal Thing angle. So this computes a new angle based off the
-    # coarse tile grid rotation. Seems to fix the weird "off-axis" shots I was seeing
-    @property
-    def angle_quantized(self): 
-        return self.tg[0] * (2*math.pi / self.num_tiles)
+# physics Things live in one ThingStore per kind (see staroids/things.py)
+Store = ThingStoreFixed if fixed_point else ThingStore
+
+def make_store(size, w=0, num_tiles=1, hitbox=None):
+    return Store(size, display.width, display.height, w=w, num_tiles=num_tiles,
+                 vmax=vmax, hitbox=hitbox or tile_w//2)  # same size hitbox for most Things
 
 
 # --- main code setup -------------------------------------------------
@@ -368,27 +142,84 @@ display.auto_refresh=False  # only update display on display.refresh()
 screen = displayio.Group()  # group that holds everything
 display.show(screen) # add main group to display
 
+# pick the biggest sprites (up to tile_w) and the most rotations that fit the budget
+roid_slots = (num_roids + 1) // 2 + 2  # tile cache size per roid sheet, if lazy_rotations
+sprite_bank, rot_step = sprites.plan(sprite_bank_fname, [t for t in (30, 20, 12) if t <= tile_w],
+                                     asset_budget or gc.mem_free() // 2,
+                                     roid_slots if lazy_rotations else 0, split=roid_split,
+                                     spans=pixel_hits)
+if sprite_bank:
+    tile_w = sprite_bank.tile_w
+    num_ship_tiles //= rot_step
+    num_roid_tiles //= rot_step
+else:
+    lazy_rotations = False  # needs the sprite bank to know the sheets
+
+# get sprite sheet 'name' from the sprite bank if we have one, or load its BMP
+def load_sheet(name, fname):
+    if sprite_bank:
+        return sprite_bank.load(name, rot_step if name in sprites.rotation_sheets else 1)
+    spr,pal = adafruit_imageload.load(fname)
+    pal.make_transparent(0)
+    return spr,pal
+
+# pixel hit spans of rotation sheet 'name', made with the sprite bank, or
+# worked out from the sheet (slow, every pixel of every tile) if it's a BMP
+def load_spans(name, spr, num_tiles):
+    if sprite_bank:
+        return sprite_bank.load_spans(name, rot_step)
+    return sheet_spans(spr, tile_w, num_tiles)
+
 # make ship sprites
-ship_sprites,ship_sprites_pal = adafruit_imageload.load(ship_fname % tile_w)
-ship_sprites_pal.make_transparent(0)
+ship_sprites,ship_sprites_pal = load_sheet('ship', ship_fname % tile_w)
 shiptg = displayio.TileGrid(ship_sprites, pixel_shader=ship_sprites_pal,
                             width=1, height=1, tile_width=tile_w, tile_height=tile_w)
-# asteroid sprites
+ship_spans = load_spans('ship', ship_sprites, num_ship_tiles) if pixel_hits else None
+# asteroid sprites, or small caches of the rotations in use if lazy_rotations
 roid_spr_pal = []
-for f in roid_fnames: 
-    spr,pal = adafruit_imageload.load(f % tile_w)
-    pal.make_transparent(0)
+roid_caches = []
+roid_spans = []  # lit pixel spans of each roid sheet's tiles, if pixel_hits
+for i,f in enumerate(roid_fnames): 
+    if lazy_rotations:
+        name = 'roid%d' % i
+        pal = sprite_bank.sheets[name][3]
+        if lazy_fill == 'rotozoom':
+            base = displayio.Bitmap(tile_w, tile_w, len(pal))
+            sprite_bank.load_tile(name, 0, base, 0)
+            fill = sprites.rotozoom_fill(base, num_roid_tiles)
+        else:
+            fill = lambda tile, bitmap, x, name=name: sprite_bank.load_tile(name, tile*rot_step, bitmap, x)
+        cache = sprites.TileCache(num_roid_tiles, tile_w, roid_slots, pal, fill)
+        roid_caches.append(cache)
+        roid_spr_pal.append( (cache.bitmap, pal) )
+        if pixel_hits:  # the sheet isn't in RAM, but the bank has its spans
+            roid_spans.append(sprite_bank.load_spans(name, rot_step))
+        continue
+    spr,pal = load_sheet('roid%d' % i, f % tile_w)
     roid_spr_pal.append( (spr,pal) )
+    if pixel_hits:
+        roid_spans.append(load_spans('roid%d' % i, spr, num_roid_tiles))
+
+# roid sheet number i at a smaller tile size, for asteroids that split off,
+# and its pixel hit spans if pixel_hits
+def load_roid_sheet(i, size):
+    try:
+        bank = sprites.SpriteBank(sprite_bank_fname % size)
+    except OSError:
+        spr = adafruit_imageload.load(roid_fnames[i] % size)[0]
+        return spr, sheet_spans(spr, size, spr.width // size) if pixel_hits else None
+    spr,pal = bank.load('roid%d' % i, rot_step)
+    spans = bank.load_spans('roid%d' % i, rot_step) if pixel_hits else None
+    bank.close()
+    return spr, spans
 
 # make roid exploding sprite
-roidexp_sprites, roidexp_sprites_pal = adafruit_imageload.load(roidexp_fname % tile_w)
-roidexp_sprites_pal.make_transparent(0)
-roidexptg = displayio.TileGrid(roidexp_sprites, pixel_shader=roidexp_sprites_pal,
-                               width=1, height=1, tile_width=tile_w, tile_height=tile_w)
+roidexp_sprites, roidexp_sprites_pal = load_sheet('roidexp', roidexp_fname % tile_w)
 
 # make shot sprite
-shot_sprites, shot_sprites_pal = adafruit_imageload.load(shot_fname)
-shot_sprites_pal.make_transparent(0)
+shot_sprites, shot_sprites_pal = load_sheet('shot', shot_fname)
+if sprite_bank and not (lazy_rotations and lazy_fill == 'flash'):
+    sprite_bank.close()
 
 # display background image
 bg_img, bg_pal = adafruit_imageload.load(bg_fname)
@@ -396,130 +227,438 @@ screen.append(displayio.TileGrid(bg_img, pixel_shader=bg_pal))
 
 # create all the asteroid Things, add them to the screen
 roids = []
+roid_store = make_store(num_roids, w=tile_w, num_tiles=num_roid_tiles)
+roid_grid = SpatialHash(display.width, display.height, tile_w)  # to find roids near things
 for i in range(num_roids):
     vx,vy = random.uniform(-0.5,0.5), random.uniform(-0.2,0.2 ) # more x than y
     spr,pal = roid_spr_pal[ i % len(roid_spr_pal) ]
     roidtg = displayio.TileGrid(spr, pixel_shader=pal, width=1, height=1,
                                 tile_width=tile_w, tile_height=tile_w)
     va = random.choice((-0.015,-0.01,0.01,0.015)) # either rotate a little one way or other
-    roid = Thing(display.width/2, display.height/2, w=tile_w, vx=vx, vy=vy, va=va,
-                 tilegrid=roidtg, num_tiles=num_roid_tiles)
+    roid = roid_store.add(display.width/2, display.height/2, vx=vx, vy=vy, va=va,
+                          tilegrid=roidtg)
+    if roid_caches:
+        roid_store.use_cache(roid.i, roid_caches[ i % len(roid_caches) ])
+    if roid_spans:
+        roid_store.use_spans(roid.i, roid_spans[ i % len(roid_spans) ])
     roids.append(roid)
     screen.append(roid.tg)
 
+# smaller asteroids that shot ones split into, one ThingStore & Pool per size,
+# all made now. All asteroids of a size share its sheets, and there are never
+# more than max_roids in play, so memory & frame time have a ceiling
+if max_roids is None:
+    max_roids = num_roids * 4
+roid_stores = [roid_store]  # biggest first
+roid_pools = [None]   # big asteroids aren't pooled, they come back after a while
+frags = []            # all the smaller asteroid Things
+if roid_split:
+    for size in (30, 20, 12):
+        if size >= tile_w or max_roids <= num_roids:
+            continue
+        loaded = [load_roid_sheet(i, size) for i in range(len(roid_fnames))]
+        sheets = [sh for sh, _ in loaded]
+        spans = [sp for _, sp in loaded] if pixel_hits else ()
+        store = make_store(max_roids - num_roids, w=size, num_tiles=sheets[0].width // size,
+                           hitbox=size//2)
+        for i in range(store.size):
+            # same palette as big asteroids, so rainbowing colors them all
+            pal = roid_spr_pal[ i % len(roid_spr_pal) ][1]
+            tg = displayio.TileGrid(sheets[ i % len(sheets) ], pixel_shader=pal, width=1,
+                                    height=1, tile_width=size, tile_height=size)
+            frag = store.add(display.width/2, display.height/2, tilegrid=tg)
+            if spans:
+                store.use_spans(frag.i, spans[ i % len(spans) ])
+            frag.hide()
+            frags.append(frag)
+            screen.append(tg)
+        roid_stores.append(store)
+        roid_pools.append(Pool(store))
+num_frags = 0   # smaller asteroids in play
+roids_high = num_roids  # most asteroids in play at once
+
 # create shot Things, add to screen, then hide them 
 shots = []
+shot_store = make_store(num_shots)
 for i in range(num_shots):
     shottg = displayio.TileGrid(shot_sprites, pixel_shader=shot_sprites_pal,
                                 width=1, height=1, tile_width=3, tile_height=3)
-    shot = Thing(display.width/2, display.height/2, tilegrid=shottg, num_tiles=1)
+    shot = shot_store.add(display.width/2, display.height/2, tilegrid=shottg)
     shot.hide()
     shots.append(shot)
     screen.append(shottg)
+shot_pool = Pool(shot_store)  # fire = spawn a shot, see staroids/pool.py
 
 # create ship Thing, add it to the screen
-ship = Thing( display.width/2, display.height/2, w=tile_w, vx=0.5, vy=0.2, angle=5.5, va=0,
-              tilegrid=shiptg, num_tiles=num_ship_tiles)
+ship_store = make_store(1, w=tile_w, num_tiles=num_ship_tiles)
+ship = ship_store.add( display.width/2, display.height/2, vx=0.5, vy=0.2, angle=5.5, va=0,
+                       tilegrid=shiptg)
+if ship_spans:
+    ship_store.use_spans(ship.i, ship_spans)
 screen.append(ship.tg)
 
-# create explosion Thing, add to screen, but hide it
-roidexp = Thing(display.width/2, display.height/2, w=tile_w, va=0.2,
-                 tilegrid=roidexptg, num_tiles=8)
-roidexp.hide() # initially don't show
-screen.append(roidexp.tg)
-
-# finally, add score display to screen
-score_label = label.Label(font=terminalio.FONT, x=5, y=5, color=0x999999, text="000")
-screen.append(score_label)
+# create explosion Things, add to screen, but hide them
+roidexps = []
+roidexp_store = make_store(num_exps, w=tile_w, num_tiles=8)
+for i in range(num_exps):
+    roidexptg = displayio.TileGrid(roidexp_sprites, pixel_shader=roidexp_sprites_pal,
+                                   width=1, height=1, tile_width=tile_w, tile_height=tile_w)
+    roidexp = roidexp_store.add(display.width/2, display.height/2, va=0.2, tilegrid=roidexptg)
+    roidexp.hide() # initially don't show
+    roidexps.append(roidexp)
+    screen.append(roidexp.tg)
+exp_pool = Pool(roidexp_store)
+exp_life = 1.5  # how long an explosion lasts
+
+# only refresh the display when something on it changed
+if use_asyncio:
+    try:
+        import asyncio
+    except ImportError:
+        use_asyncio = False  # no asyncio library, use the plain loop
+dirty = DirtyTracker(display, target_fps=target_fps, paced=not use_asyncio)
+for thing in roids + frags + shots + [ship] + roidexps:
+    dirty.watch(thing.tg, max(thing.w, 3), max(thing.w, 3))  # shots are 3x3
+
+# finally, add score (and stats) display to screen, see staroids/hud.py
+hud = HUD(screen, dirty, display.width, stats=show_stats)
+
+# rainbow mode colors, each palette costs the area of everything drawn with it
+palettes = None
+if rainbow:
+    from staroids.palettes import PaletteAnim
+    palettes = PaletteAnim(dirty)
+    palettes.add(ship_sprites_pal, area=tile_w * tile_w)
+    palettes.add(roidexp_sprites_pal, area=tile_w * tile_w * num_exps)
+    palettes.add(shot_sprites_pal, area=9 * num_shots)
+    for (spr,pal) in roid_spr_pal:
+        palettes.add(pal, area=sum(r.w * r.w for r in roids + frags if r.tg.pixel_shader is pal))
+    palettes.add(hud.palette, hz=10, area=hud.area)
+    if rainbow_bg:
+        palettes.add(bg_pal, hz=10, area=dirty.screen_area)
 
 # see if asteroid was hit and by what
-def roid_hit(roid,hit_ship=False):
-    global score
-    print("hit")
+def roid_hit(roid,now,hit_ship=False):
+    global score, num_frags, roids_high
+    if prof: prof.event("hit")
     if hit_ship:
-        play_effect(1, 0x9900ff)
-        leds.fill(0x9900ff)
+        effect(1, 0x9900ff)
         score = max(score + point_ship,0) # never go below score=0
     else:
-        play_effect(1, 0xff3300)
+        effect(1, 0xff3300)
         score = max(score + point_roid,0) # never go below score=0
-    score_label.text = ("%03d" % score)
-    roidexp.hide(False) # show explosion
-    roidexp.set_pos(roid) # give it roid's position
-    roidexp.va = 0.5  # gotta put back explosions spin
-    roid.hide() # hide now exploded roid
-    # and give it a new random location
-    roid.x = random.randint(0,display.width)
-    roid.y = random.randint(0,display.height)
+    hud.set_score(score)
+    if quality < 2:  # explosions are the first thing to go after LEDs
+        i = exp_pool.spawn(now, exp_life) # show explosion, if there's one free
+        if i >= 0:
+            roidexp = roidexps[i]
+            roidexp.set_pos(roid) # give it roid's position
+            roidexp.va = 0.5  # gotta put back explosions spin
+    roid_grid.remove(roid) # stop colliding with it
+    size = roid_stores.index(roid.store)  # 0 = biggest
+    # split a shot one in two smaller ones, if there's a smaller size & room for more
+    # (not when it hits the ship, the pieces would land right on it & hit it again)
+    if not hit_ship and size + 1 < len(roid_stores) and quality < 3 and \
+       num_frags + 2 <= max_roids - num_roids:
+        pool = roid_pools[size + 1]
+        dx, dy = random.uniform(-0.5,0.5), random.uniform(-0.5,0.5)
+        for kick in (-1, 1):  # push them apart
+            i = pool.spawn(now, 0)
+            frag = pool.store.things[i]
+            frag.set_pos(roid)
+            frag.vx += kick * dx
+            frag.vy += kick * dy
+            frag.va = random.choice((-0.03,-0.02,0.02,0.03)) # small ones spin faster
+        num_frags += 2
+        roids_high = max(roids_high, num_roids + num_frags)
+    if size:
+        roid_pools[size].despawn(roid.i) # small ones are gone for good
+        num_frags -= 1
+    else:
+        roid.hide() # hide now exploded roid
+        # and give it a new random location
+        roid.x = random.randint(0,display.width)
+        roid.y = random.randint(0,display.height)
+
+# quality levels: 0 = all on, 1 = no LED/palette effects, 2 = no explosions,
+# 3 = no splitting (if splitting), then one less big asteroid each, down to half
+quality = 0
+min_roids = max(num_roids // 2, 1)
+active_roids = num_roids  # how many big asteroids are in play
+roid_level = 3 if frags else 2  # quality level where big asteroids start going
+
+def set_quality(level):
+    global quality, active_roids, num_frags
+    quality = level
+    if quality >= 1:
+        lights.clear()
+    if quality >= 2:
+        exp_pool.clear()
+    if quality >= 3 and num_frags:
+        for frag in frags:  # clear out the small ones
+            roid_grid.remove(frag)
+        for pool in roid_pools[1:]:
+            pool.clear()
+        num_frags = 0
+    active_roids = num_roids - max(quality - roid_level, 0)
+    for roid in roids[active_roids:]:  # retire extra asteroids until things get better
+        roid.hide()
+        roid_grid.remove(roid)
 
 # --- main loop --------------------------------------------------------
 
-last_led_time = 0   # when was LED age last checked
 last_roid_time = 0  # when was asteroid age last checked  
 shot_time = 0       # when did shooting start
-shot_index = -1     # which shot are we on
 turning = 0 # neg if currrently turning left, pos if turning right
 thrusting = False   # true if thrusting 
 firing = False      # true if firing
+# every board's buttons end up here, see staroids/controls.py
+controls = Controls(record=input_record, replay=input_replay)
+# the computer player, flying instead of the buttons (attract mode & soak tests)
+pilot = None
+if (autopilot is not None or attract_after) and not input_replay:
+    from staroids.autopilot import Autopilot
+    pilot = Autopilot(ship, roid_stores, 0.5 if autopilot is None else autopilot)
+    pilot.flying = autopilot is not None
+    buttons = Controls()  # the real buttons while it flies, so we know when someone wants to play
+last_press = time.monotonic()  # when a button was last pressed, for attract mode
+fx_pew = False      # pew sound wanted
+fx_exp = -1         # explosion wanted, with this LED color
+
+# ask for a sound/light effect (fx_type = 0 pew, 1 explosion), it's played
+# by run_effects() so slow LEDs & audio don't hold up physics
+def effect(fx_type, fx_color=0):
+    global fx_pew, fx_exp
+    if fx_type == 0:
+        fx_pew = True
+    else:
+        fx_exp = fx_color
 
-while True:
-    now = time.monotonic()
-    # get what user wants, (thrust & fire separate now, even tho normally don't use it)
-    turning, thrusting, firing = get_user_input(turning,thrusting,firing)
+# one physics tick, 'now' is game time in seconds
+def game_tick(now):
+    global shot_time, last_roid_time
 
     # update ship state
-    ship.angle = ship.angle + turning
+    ship.turn(turning)
     if thrusting: 
-        ship.accelerate( ship.angle, accel_max_ship)
+        ship.thrust(accel_max_ship)
     if firing:
         if now - shot_time > 0.2:  # Fire ze missiles 
             shot_time = now
-            print("fire", ship.angle, ship.tg[0], ship.angle_quantized)
-            play_effect(0)
-            shot_index = (shot_index+1) % len(shots)
-            shot = shots[shot_index]
-            if shot.hidden:  # we can use this shot
-                shot.x, shot.y = ship.x,ship.y # put shot at ship pos
-                shot.vx,shot.vy = 0,0  # we accelerate it later
-                shot.time = time.monotonic() # newborn!
-                shot.accelerate(ship.angle_quantized, accel_max_shot) 
-                shot.hide(False) # show it off
+            if prof: prof.event("fire")
+            effect(0)
+            i = shot_pool.spawn(now, shot_life) # newborn!
+            if i >= 0:  # we had a shot to use
+                shots[i].launch(ship, accel_max_shot) # put shot at ship pos, moving
 
     # update ship position
-    ship.update_pos( thrusting )
+    ship_store.update( thrusting )
     
-    # update asteroids state and positions
-    for roid in roids:
-        roid.update_pos()
-        for shot in shots:
-            if not shot.hidden and roid.is_hit(shot):
-                roid_hit(roid) # FIXME magic value 0 and 1
-                shot.hide()
-        if roid.is_hit( ship ):
-            roid_hit(roid,hit_ship=True)
+    # update asteroids state and positions, all in one go per size
+    roid_store.update()
+    for pool in roid_pools[1:]:
+        if pool.live: pool.store.update()
+    if prof: prof.mark(P_PHYSICS)
+    for store in roid_stores:
+        roid_grid.update(store)
+
+    # see if any shots or the ship hit nearby asteroids
+    for shot in shots:
+        if not shot.hidden:
+            roid = roid_grid.first_hit(shot)
+            if roid:
+                roid_hit(roid, now)
+                shot_pool.despawn(shot.i)
+    while True:
+        roid = roid_grid.first_hit(ship)
+        if not roid: break
+        roid_hit(roid,now,hit_ship=True)
+    if prof: prof.mark(P_COLLIDE)
 
     # update shot positions, age them out
-    for shot in shots:
-        shot.update_pos()
-        if time.monotonic() - shot.time > shot_life: 
-            shot.hide()
+    shot_store.update()
+    if prof: prof.mark(P_PHYSICS)
+    shot_pool.age_out(now)
             
-    # update position of our single explosion thing
-    roidexp.update_pos()
+    # update position of explosions, age them out
+    if exp_pool.live:
+        roidexp_store.update()
+        exp_pool.age_out(now)
 
-    # age out the explosion, 1.5 = explosion lifetime
+    # bring back shot asteroids every 1.5 secs
     if now - last_roid_time > 1.5:
         last_roid_time = now
-        for roid in roids:
+        for roid in roids[:active_roids]:
             if roid.hidden: # roid was shot
                 roid.hide(False) # show it, its already in new location
-        roidexp.hide() # don't need explosion any more
-
-    display.refresh(target_frames_per_second=30)
+    if prof: prof.mark(P_AGING)
+
+# per-phase timings, off unless 'profiling = True'
+P_INPUT, P_PHYSICS, P_COLLIDE, P_AGING, P_REFRESH, P_LEDS = range(6)
+prof = None
+if profiling:
+    import supervisor, sys
+    from staroids.prof import Profiler
+    prof = Profiler(("input", "physics", "collide", "aging", "refresh", "leds"))
+
+stepper = FixedStep(tick_hz, max_ticks=3, lockstep=lockstep)  # physics runs at tick_hz, refresh when it can
+governor = Governor(target_fps, max_level=roid_level + num_roids - min_roids)
+
+# the whole game state, for snapshots & checksums (see staroids/snapshot.py)
+# tick, score, shot & roid times (as ticks), quality, active_roids, num_frags,
+# roids_high, random seed, input frame, held controls
+# only made (and imported) if a setting asks for them
+state_fmt = '<IiiiBBHHIIB'
+game_state = trace = None
+if checksum_every or snapshot_save or snapshot_load:
+    from staroids.snapshot import GameState, Trace
+    game_state = GameState(roid_stores + [shot_store, ship_store, roidexp_store],
+                           [pool for pool in roid_pools if pool] + [shot_pool, exp_pool],
+                           roid_grid, state_fmt)
+    if golden_trace and checksum_every:
+        trace = Trace(golden_trace)
+
+def state_values(seed=0):
+    return (stepper.ticks, score, stepper.ticks_of(shot_time), stepper.ticks_of(last_roid_time),
+            quality, active_roids, num_frags, roids_high, seed, controls.frames, controls.held)
+
+def after_tick():
+    tick = stepper.ticks
+    if checksum_every and tick % checksum_every == 0:
+        crc = game_state.checksum(state_values())
+        if trace:
+            trace.check(tick, crc)
+        else:
+            print("tick", tick, "state %08x" % crc)
+    if snapshot_save and tick == snapshot_save[0]:
+        seed = random.getrandbits(30)  # reseed, so a run from the snapshot has the same randoms
+        random.seed(seed)
+        game_state.save(snapshot_save[1], state_values(seed))
+
+if snapshot_load:
+    (tick, score, shot_tick, roid_tick, quality, active_roids, num_frags, roids_high,
+     seed, frame, held) = game_state.load(snapshot_load)
+    stepper.time_ns = tick * stepper.tick_ns
+    shot_time, last_roid_time = stepper.time_of(shot_tick), stepper.time_of(roid_tick)
+    random.seed(seed)
+    controls.seek(frame, held)
+    hud.set_score(score)
+
+# the parts of a frame, run in turn by the main loop or as asyncio tasks
+
+def read_input():
+    global rainbowing, last_press
+    controls.frame()
+    if pilot and pilot.flying:
+        buttons.frame()
+        get_user_input(buttons)
+        if attract_after and (buttons.held or buttons.pressed):  # someone wants to play
+            pilot.flying = False
+            controls.poll(buttons.held, pilot.mask | SELECT)  # the player has the buttons held now
+            last_press = time.monotonic()
+        else:
+            pilot(controls)
+        buttons.consume()
+    else:
+        get_user_input(controls)
+        if controls.held or controls.pressed:
+            last_press = time.monotonic()
+        elif pilot and attract_after and time.monotonic() - last_press > attract_after:
+            pilot.flying = True  # nobody's playing, show off
+    rainbowing = rainbow and controls.down(SELECT)  # secret rainbowing mode
+
+def run_physics():
+    global turning, thrusting, firing
+    # get what user wants, (thrust & fire separate now, even tho normally don't use it)
+    turning = controls.turning(turn_rate)
+    thrusting, firing = controls.down(THRUST), controls.down(FIRE)
+    controls.consume()
+    # catch up physics to real time, skipping drawing of in-between ticks
+    for i in range(stepper.due()):
+        game_tick(stepper.tick())
+        if checksum_every or snapshot_save:
+            after_tick()
+
+def render(frame_ns):
+    hud.frame(frame_ns)
+    dirty.refresh() # display.refresh(), but only if something changed
+    controls.shown()
+    if prof: prof.mark(P_REFRESH)
+    if use_governor:
+        level = governor.update(frame_ns)
+        if level != quality:
+            set_quality(level)
+
+def run_effects():
+    global fx_pew, fx_exp
+    if fx_pew:
+        fx_pew = False
+        play_effect(0)
+    if fx_exp >= 0:
+        play_effect(1, fx_exp)
+        fx_exp = -1
+    if rainbowing and quality < 1:  # rainbow mode! leave the background if frames run long
+        palettes.update(time.monotonic(), tight=use_governor and governor.avg_ns > governor.budget_ns)
+    # fade out "you were hit" LEDs, light up held keys, one show() if they changed
+    lights.held_keys(controls.held if quality < 1 else 0)
+    lights.update(time.monotonic())
+    if prof: prof.mark(P_LEDS)
+
+def end_frame():
+    if prof:
+        prof.end_frame()
+        if supervisor.runtime.serial_bytes_available:  # key typed, show summary
+            sys.stdin.read(supervisor.runtime.serial_bytes_available)
+            print(prof.summary())
+            print("shots:", shot_pool.report(), " explosions:", exp_pool.report())
+        elif profile_every and prof.frames % profile_every == 0:
+            print(prof.summary())
+
+# asyncio tasks, each at its own rate. Drawing just uses the latest buttons
+# read. The tasks take turns, so a slow read (like the PyPortal's I2C joystick)
+# still stalls everything while it runs, but only input_hz times a second
+async def input_task():
+    while True:
+        if prof: prof.start()
+        read_input()
+        if prof: prof.mark(P_INPUT)
+        await asyncio.sleep(1 / input_hz)
+
+async def physics_task():
+    while True:
+        if prof: prof.start()
+        run_physics()
+        await asyncio.sleep(stepper.until_next())
+
+async def render_task():
+    budget_ns = 1_000_000_000 // target_fps
+    last_ns = time.monotonic_ns()
+    while True:
+        start_ns = time.monotonic_ns()
+        if prof: prof.start()
+        render(start_ns - last_ns)
+        last_ns = start_ns
+        end_frame()
+        await asyncio.sleep(max(budget_ns - (time.monotonic_ns() - start_ns), 0) / 1e9)
+
+async def effects_task():
+    while True:
+        if prof: prof.start()
+        run_effects()
+        await asyncio.sleep(1 / fx_hz)
+
+async def main():
+    await asyncio.gather(asyncio.create_task(input_task()), asyncio.create_task(physics_task()),
+                         asyncio.create_task(render_task()), asyncio.create_task(effects_task()))
+
+if use_asyncio:
+    asyncio.run(main())
 
-    # LED aging and debug
-    if time.monotonic() - last_led_time > 0.4:
-        last_led_time = time.monotonic()
-        leds.fill(0) # age out "you were hit" LEDs
-        if 'Macropad' in board_type:  # FIXME figure out way to make per-board
-            leds[3:6] = (0x111111,0x111111,0x111111) # return them to on
+while True:
+    if prof: prof.start()
+    read_input()
+    if prof: prof.mark(P_INPUT)
+    run_physics()
+    render(stepper.frame_ns)
+    run_effects()
+    end_frame()
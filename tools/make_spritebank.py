@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# make_spritebank.py -- pack staroids sprite sheets into one sprite bank file
+# for staroids/sprites.py to load without any BMP parsing on the board.
+#
+# From the BMP sprite sheets already in imgs/ (what's normally needed):
+#   python3 tools/make_spritebank.py 30 20 12
+#     -> imgs/sprites_30.bin, imgs/sprites_20.bin, imgs/sprites_12.bin
+#
+# Or straight from single un-rotated sprites (square palette BMPs), making the
+# rotations here instead of with ImageMagick:
+#   python3 tools/make_spritebank.py 30 --rotate ship0.bmp ship1.bmp roid0.bmp roid1.bmp roidexp.bmp
+import argparse, math, os, struct
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+magic, version = b'SPRB', 2
+rotation_sheets = ('ship', 'roid0', 'roid1')  # these get pixel hit spans
+
+def read_bmp(fname):
+    """returns (width, height, bpp, colors, rows of pixel values) of a palette BMP"""
+    with open(fname, 'rb') as f:
+        data = f.read()
+    if data[:2] != b'BM':
+        raise ValueError("not a BMP: " + fname)
+    offset, = struct.unpack_from('<I', data, 10)
+    hsize, width, height, _, bpp, comp = struct.unpack_from('<IiiHHI', data, 14)
+    if bpp > 8 or comp != 0:
+        raise ValueError("only uncompressed palette BMPs: " + fname)
+    ncolors, = struct.unpack_from('<I', data, 46)
+    ncolors = ncolors or (1 << bpp)
+    colors = []
+    for i in range(ncolors):
+        b, g, r, _ = data[14 + hsize + i*4 : 18 + hsize + i*4]
+        colors.append((r << 16) | (g << 8) | b)
+    stride = ((width * bpp + 31) // 32) * 4
+    mask = (1 << bpp) - 1
+    rows = []
+    for row in range(abs(height)):
+        line = data[offset + row*stride : offset + (row+1)*stride]
+        rows.append([(line[x*bpp // 8] >> (8 - bpp - x*bpp % 8)) & mask for x in range(width)])
+    if height > 0:  # bottom-up
+        rows.reverse()
+    return width, abs(height), bpp, colors, rows
+
+def pack_rows(rows, bpp):
+    """rows of pixel values -> bytes, each row padded to a whole byte, MSB first"""
+    out = bytearray()
+    per_byte = 8 // bpp
+    for row in rows:
+        for x in range(0, len(row), per_byte):
+            b = 0
+            for i in range(per_byte):
+                v = row[x + i] if x + i < len(row) else 0
+                b |= v << (8 - bpp * (i + 1))
+            out.append(b)
+    return bytes(out)
+
+def sheet_spans(rows, tile_w):
+    """pixel hit spans of the first row of tiles, like staroids/collide.py's
+    sheet_spans(): per tile, per row, leftmost & rightmost lit pixel"""
+    out = bytearray()
+    for x0 in range(0, len(rows[0]) - tile_w + 1, tile_w):
+        for y in range(tile_w):
+            lit = [x for x in range(tile_w) if rows[y][x0 + x]]
+            out += bytes((lit[0], lit[-1])) if lit else bytes((255, 0))
+    return bytes(out)
+
+def rotate(rows, degrees):
+    """nearest-neighbor rotate a square sprite clockwise, like 'convert -distort SRT'"""
+    n = len(rows)
+    c = (n - 1) / 2
+    a = math.radians(degrees)
+    ca, sa = math.cos(a), math.sin(a)
+    out = []
+    for y in range(n):
+        line = []
+        for x in range(n):
+            sx = round(ca * (x - c) + sa * (y - c) + c)  # inverse-rotate back
+            sy = round(-sa * (x - c) + ca * (y - c) + c) # to the source pixel
+            line.append(rows[sy][sx] if 0 <= sx < n and 0 <= sy < n else 0)
+        out.append(line)
+    return out
+
+def sheet(sprites, count):
+    """rows of a sprite sheet: one row of 'count' rotations per sprite"""
+    rows = []
+    for spr in sprites:
+        tiles = [rotate(spr, i * 360 / count) for i in range(count)]
+        for y in range(len(spr)):
+            rows.append([p for t in tiles for p in t[y]])
+    return rows
+
+def write_bank(fname, tile_w, sheets):
+    """sheets: list of (name, width, height, bpp, colors, rows), color 0 transparent"""
+    dir_size = 8 + sum(24 + 4 * len(s[4]) for s in sheets)
+    packed = [pack_rows(s[5], s[3]) for s in sheets]
+    spans_at = dir_size + sum(len(p) for p in packed)  # spans go after all the pixels
+    header = bytearray(magic + bytes((version, tile_w, len(sheets), 0)))
+    data, spans = bytearray(), bytearray()
+    for (name, w, h, bpp, colors, rows), pixels in zip(sheets, packed):
+        spans_offset = 0
+        if name in rotation_sheets:
+            spans_offset = spans_at + len(spans)
+            spans += sheet_spans(rows, tile_w)
+        header += struct.pack('<8sHHBBBBII', name.encode(), w, h, bpp, len(colors), 0, 0,
+                              dir_size + len(data), spans_offset)
+        header += struct.pack('<%dI' % len(colors), *colors)
+        data += pixels
+    data += spans
+    with open(fname, 'wb') as f:
+        f.write(header + data)
+    return len(header) + len(data)
+
+def from_sheets(tile_w):
+    sheets = []
+    for name in ('ship', 'roid0', 'roid1', 'roidexp'):
+        sheets.append((name,) + read_bmp(os.path.join(root_dir, 'imgs', '%s_%d_sheet.bmp' % (name, tile_w))))
+    sheets.append(('shot',) + read_bmp(os.path.join(root_dir, 'imgs', 'shotsm3.bmp')))
+    return sheets
+
+def from_sprites(ship0, ship1, roid0, roid1, roidexp, num_ship_tiles=36, num_roid_tiles=120):
+    sheets = []
+    for name, srcs, count in (('ship', (ship0, ship1), num_ship_tiles), ('roid0', (roid0,), num_roid_tiles),
+                              ('roid1', (roid1,), num_roid_tiles), ('roidexp', (roidexp,), 8)):
+        bmps = [read_bmp(f) for f in srcs]
+        rows = sheet([b[4] for b in bmps], count)
+        sheets.append((name, len(rows[0]), len(rows), bmps[0][2], bmps[0][3], rows))
+    sheets.append(('shot',) + read_bmp(os.path.join(root_dir, 'imgs', 'shotsm3.bmp')))
+    return sheets
+
+def main():
+    p = argparse.ArgumentParser(description="pack staroids sprite sheets into sprite banks")
+    p.add_argument('sizes', type=int, nargs='+', help='tile sizes to make banks for')
+    p.add_argument('--rotate', nargs=5, metavar=('SHIP0', 'SHIP1', 'ROID0', 'ROID1', 'ROIDEXP'),
+                   help='make rotations from these single sprites instead of using sheets')
+    p.add_argument('-o', '--out', default=os.path.join(root_dir, 'imgs', 'sprites_%d.bin'),
+                   help='output file name template (default: imgs/sprites_%%d.bin)')
+    args = p.parse_args()
+    for tile_w in args.sizes:
+        sheets = from_sprites(*args.rotate) if args.rotate else from_sheets(tile_w)
+        fname = args.out % tile_w
+        size = write_bank(fname, tile_w, sheets)
+        print("wrote %s, %d bytes, %s" % (fname, size, ' '.join(s[0] for s in sheets)))
+
+if __name__ == '__main__':
+    main()